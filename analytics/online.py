@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from analytics.rolling import periods_per_year
+
+
+def _frontier(peaks, troughs):
+    """
+    (peak, trough) drawdown steps that can still set the max drawdown once
+    an earlier history with any peak P is put in front: a step measures
+    trough / max(P, peak), so it is dropped when another has both a lower
+    or equal trough and a lower or equal trough / peak.
+    """
+    if len(peaks) < 2:
+        return peaks, troughs
+    ratio = troughs / peaks
+    order = np.lexsort((ratio, troughs))
+    best_before = np.minimum.accumulate(np.append(np.inf, ratio[order][:-1]))
+    keep = np.sort(order[ratio[order] < best_before])
+    return peaks[keep], troughs[keep]
+
+
+class OnlineMetrics:
+    """
+    Streaming NAV metrics: O(1) work per bar, nothing kept of the history,
+    mergeable across consecutive chunks (runs, extend() calls, workers
+    that each processed one time slice).
+
+    Log return moments use Welford's update (Chan et al. to merge two
+    chunks, plus the return across their boundary). Drawdown keeps the
+    running peak and the trough since it; earlier (peak, trough) steps are
+    only kept while a chunk merged in front with a higher peak could make
+    them the deepest one, usually a handful.
+
+    summary() matches analytics.rolling.nav_summary on the concatenated NAV
+    (same skipping of missing values, annualization and Sharpe), up to
+    float rounding, and adds the cash share and trade counters.
+
+    Parameters:
+        granularity (str): bar size for annualization, defaults to cfg.GRANULARITY
+        risk_free_rate (float): annual rate used in the Sharpe ratio
+
+    Usage:
+        live = OnlineMetrics("1h")
+        for time, nav, position in stream:
+            live.update(nav, position, time=time)
+        chunks[0].merge(chunks[1]).summary()
+    """
+
+    def __init__(self, granularity: str = None, risk_free_rate: float = 0.05):
+        self.granularity = granularity or cfg.GRANULARITY
+        self.ppy = periods_per_year(self.granularity)
+        self.risk_free_rate = risk_free_rate
+        self.bars = 0                      # non-missing NAV points
+        self.first_nav = self.last_nav = np.nan
+        self.first_time = self.last_time = None
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0   # log returns: count, mean, sum of squared deviations
+        self.peak = self.trough = np.nan   # running peak and lowest NAV since
+        self.max_drawdown = 0.0
+        self.step_peaks = self.step_troughs = np.empty(0)
+        self.cash = self.cash_nav = 0.0    # sums of cash and of NAV where cash is known
+        self.first_position = self.last_position = None
+        self.opened = self.closed = 0
+
+    # ---------- UPDATES ----------
+    def update(self, nav: float, position: float = None, cash: float = None, time=None):
+        """
+        Add one bar. A missing NAV is skipped (the next return spans the gap).
+        Parameters:
+            nav (float): NAV at the bar
+            position (float): exposure held during the bar; counts opened /
+                              closed positions, and cash = nav * (1 - |position|)
+            cash (float): cash at the bar, overrides the one implied by position
+        """
+        if position is not None:
+            self._count_trades(np.array([position], dtype="float64"))
+            if cash is None:
+                cash = nav * (1 - abs(position))
+        if np.isnan(nav):
+            return self
+        if cash is not None and not np.isnan(cash):
+            self.cash += cash
+            self.cash_nav += nav
+
+        if self.bars:
+            r = np.log(nav / self.last_nav)
+            self.n += 1
+            delta = r - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (r - self.mean)
+        else:
+            self.first_nav, self.first_time = nav, time
+        self.bars += 1
+        self.last_nav, self.last_time = nav, time
+
+        if not nav <= self.peak:           # new high (or first bar): previous step is closed
+            if self.bars > 1:
+                self.step_peaks, self.step_troughs = _frontier(
+                    np.append(self.step_peaks, self.peak), np.append(self.step_troughs, self.trough)
+                )
+            self.peak = self.trough = nav
+        else:
+            self.trough = min(self.trough, nav)
+            self.max_drawdown = min(self.max_drawdown, nav / self.peak - 1)
+        return self
+
+    def update_many(self, nav, positions=None, cash=None, times=None):
+        """
+        Add consecutive bars at once, vectorized; same result as update() per bar.
+        Parameters:
+            nav (array | Series): NAVs, a Series index is used as times
+            positions, cash (array): per bar, as in update()
+        """
+        return self.merge(self.from_arrays(nav, positions, cash, times, self.granularity, self.risk_free_rate))
+
+    @classmethod
+    def from_arrays(cls, nav, positions=None, cash=None, times=None, granularity=None, risk_free_rate=0.05):
+        """Accumulator of one chunk of bars (see update_many)."""
+        acc = cls(granularity, risk_free_rate)
+        if times is None and isinstance(nav, pd.Series):
+            times = nav.index
+        nav = np.asarray(nav, dtype="float64")
+        if positions is not None:
+            positions = np.asarray(positions, dtype="float64")
+            acc._count_trades(positions)
+            if cash is None:
+                cash = nav * (1 - np.abs(positions))
+        valid = ~np.isnan(nav)
+        if cash is not None:
+            cash = np.asarray(cash, dtype="float64")
+            known = valid & ~np.isnan(cash)
+            acc.cash, acc.cash_nav = float(cash[known].sum()), float(nav[known].sum())
+
+        rows = np.flatnonzero(valid)
+        if not len(rows):
+            return acc
+        if times is not None:
+            acc.first_time, acc.last_time = times[rows[0]], times[rows[-1]]
+        nav = nav[rows]
+        logret = np.diff(np.log(nav))
+        acc.n = len(logret)
+        acc.mean = float(logret.mean()) if acc.n else 0.0
+        acc.m2 = float(((logret - acc.mean) ** 2).sum())
+        acc.bars = len(nav)
+        acc.first_nav, acc.last_nav = nav[0], nav[-1]
+
+        running_peak = np.maximum.accumulate(nav)
+        acc.max_drawdown = float(min((nav / running_peak - 1).min(), 0.0))
+        highs = np.flatnonzero(np.append(True, nav[1:] > running_peak[:-1]))
+        peaks, troughs = nav[highs], np.minimum.reduceat(nav, highs)
+        acc.peak, acc.trough = peaks[-1], troughs[-1]
+        acc.step_peaks, acc.step_troughs = _frontier(peaks[:-1], troughs[:-1])
+        return acc
+
+    def _count_trades(self, positions):
+        if not len(positions):
+            return
+        held = positions != 0
+        prev = np.append(self.last_position is not None and self.last_position != 0, held[:-1])
+        self.opened += int(np.count_nonzero(held & ~prev))
+        self.closed += int(np.count_nonzero(~held & prev))
+        if self.first_position is None:
+            self.first_position = float(positions[0])
+        self.last_position = float(positions[-1])
+
+    # ---------- MERGE ----------
+    def _add_moments(self, n, mean, m2):
+        total = self.n + n
+        if n == 0:
+            return
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def merge(self, other: "OnlineMetrics"):
+        """
+        Append the accumulator of the bars right after this one's (in place).
+        Returns self, so chunk accumulators fold left to right.
+        """
+        if other.first_time is not None and self.last_time is not None and other.first_time <= self.last_time:
+            raise ValueError(
+                f"Chunks must be merged in time order: {other.first_time} is not after {self.last_time}"
+            )
+        self.cash += other.cash
+        self.cash_nav += other.cash_nav
+        self.opened += other.opened
+        self.closed += other.closed
+        if other.first_position is not None:
+            # other counted its first bar as if it started flat
+            if self.last_position is not None and self.last_position != 0:
+                if other.first_position != 0:
+                    self.opened -= 1
+                else:
+                    self.closed += 1
+            if self.first_position is None:
+                self.first_position = other.first_position
+            self.last_position = other.last_position
+
+        if not other.bars:
+            return self
+        if not self.bars:
+            for attr in ("bars", "first_nav", "last_nav", "first_time", "last_time", "n", "mean", "m2",
+                         "peak", "trough", "max_drawdown", "step_peaks", "step_troughs"):
+                setattr(self, attr, getattr(other, attr))
+            return self
+
+        # moments: the return across the boundary, then other's returns
+        self._add_moments(1, float(np.log(other.first_nav / self.last_nav)), 0.0)
+        self._add_moments(other.n, other.mean, other.m2)
+
+        # other's steps measured from the higher of the two peaks; steps below
+        # this peak are no new highs and fold into its trough
+        peaks = np.append(other.step_peaks, other.peak)
+        troughs = np.append(other.step_troughs, other.trough)
+        self.max_drawdown = min(self.max_drawdown, float((troughs / np.maximum(peaks, self.peak)).min() - 1))
+        higher = peaks > self.peak
+        trough = min(self.trough, troughs[~higher].min(initial=np.inf))
+        if higher[-1]:
+            self.step_peaks, self.step_troughs = _frontier(
+                np.concatenate([self.step_peaks, [self.peak], peaks[:-1][higher[:-1]]]),
+                np.concatenate([self.step_troughs, [trough], troughs[:-1][higher[:-1]]]),
+            )
+            self.peak, self.trough = other.peak, other.trough
+        else:
+            self.trough = trough
+
+        self.bars += other.bars
+        self.last_nav, self.last_time = other.last_nav, other.last_time
+        return self
+
+    # ---------- RESULTS ----------
+    def summary(self) -> dict:
+        """nav_summary keys, plus bars, cash share and opened / closed positions."""
+        if self.bars < 2:
+            return {}
+        years = self.n / self.ppy
+        total = self.last_nav / self.first_nav - 1
+        ann_return = (1 + total) ** (1 / years) - 1 if years > 0 else 0.0
+        vol = np.sqrt(self.m2 / (self.n - 1)) * np.sqrt(self.ppy) if self.n > 1 else np.nan
+        return {
+            "total_return": float(total),
+            "ann_return": float(ann_return),
+            "ann_vol": float(vol),
+            "sharpe": float((ann_return - self.risk_free_rate) / vol) if vol > 0 else 0.0,
+            "max_drawdown": float(self.max_drawdown),
+            "bars": self.bars,
+            "cash_share": self.cash / self.cash_nav if self.cash_nav else np.nan,
+            "opened": self.opened,
+            "closed": self.closed,
+        }
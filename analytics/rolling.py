@@ -0,0 +1,137 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from utils.helpers import granularity_to_timedelta
+
+
+@lru_cache(maxsize=None)
+def periods_per_year(granularity: str) -> float:
+    """Number of bars in a 365.25-day year, e.g. 365.25 for '1d', 8766 for '1h'."""
+    return pd.Timedelta(days=365.25) / granularity_to_timedelta(granularity)
+
+
+def nav_summary(nav: pd.Series, ppy: float, risk_free_rate: float = 0.05) -> dict:
+    """Total/annual return, volatility, Sharpe and max drawdown of one NAV series."""
+    nav = nav.dropna()
+    if len(nav) < 2:
+        return {}
+    logret = np.log(nav).diff().dropna()
+    years = len(logret) / ppy
+    total = nav.iloc[-1] / nav.iloc[0] - 1
+    ann_return = (1 + total) ** (1 / years) - 1 if years > 0 else 0.0
+    vol = logret.std() * np.sqrt(ppy)
+    return {
+        "total_return": float(total),
+        "ann_return": float(ann_return),
+        "ann_vol": float(vol),
+        "sharpe": float((ann_return - risk_free_rate) / vol) if vol > 0 else 0.0,
+        "max_drawdown": float((nav / nav.cummax() - 1).min()),
+    }
+
+
+def window_sum(x: np.ndarray, w: int) -> np.ndarray:
+    """
+    Sum over the trailing `w` rows of a 2D array, O(n) via cumulative sums.
+    Rows before the first full window are NaN.
+    """
+    cs = np.cumsum(x, axis=0)
+    out = np.full(x.shape, np.nan)
+    if w <= x.shape[0]:
+        out[w - 1] = cs[w - 1]
+        out[w:] = cs[w:] - cs[:-w]
+    return out
+
+
+def rolling_max(x: np.ndarray, w: int) -> np.ndarray:
+    """
+    Maximum over the trailing `w` rows of a 2D array, O(n) for any window.
+
+    van Herk / Gil-Werman: split rows into blocks of `w`, take running maxima
+    forward (prefix) and backward (suffix) inside each block; any window spans
+    at most two blocks, so its max is max(suffix[start], prefix[end]).
+    NaN is treated as missing; rows before the first full window are NaN.
+    """
+    n = x.shape[0]
+    out = np.full(x.shape, np.nan)
+    if w > n:
+        return out
+    pad = (-n) % w
+    filled = np.concatenate(
+        [np.where(np.isnan(x), -np.inf, x), np.full((pad,) + x.shape[1:], -np.inf)]
+    )
+    blocks = filled.reshape((-1, w) + x.shape[1:])
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(filled.shape)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(filled.shape)
+    out[w - 1:] = np.maximum(suffix[: n - w + 1], prefix[w - 1: n])
+    out[np.isneginf(out)] = np.nan
+    return out
+
+
+def rolling_metrics(
+    navs,
+    windows=(30, 90, 365),
+    granularity: str = None,
+    risk_free_rate: float = 0.05,
+) -> dict:
+    """
+    Rolling return, volatility, Sharpe and drawdown for many NAV series at once.
+    Every window costs O(n) per series whatever its length.
+
+    A window of `w` bars covers the `w` log returns ending at t (NAV points t-w..t).
+    Windows containing a missing NAV are NaN.
+
+    Parameters:
+        navs (DataFrame | Series): time x strategy NAVs
+        windows (iterable): window lengths in bars
+        granularity (str): bar size for annualization, defaults to cfg.GRANULARITY
+        risk_free_rate (float): annual rate used in the Sharpe ratio, as in reporting.metrics
+    Returns:
+        dict: {'return' | 'ann_return' | 'vol' | 'sharpe' | 'drawdown':
+               DataFrame indexed like `navs`, columns (window, strategy)}
+        'drawdown' is NAV relative to its peak within the window (<= 0).
+    """
+    if isinstance(navs, pd.Series):
+        navs = navs.to_frame(navs.name or "nav")
+    ppy = periods_per_year(granularity or cfg.GRANULARITY)
+
+    nav = navs.to_numpy(dtype="float64")
+    log_nav = np.log(nav)
+    logret = np.vstack([np.full((1, nav.shape[1]), np.nan), np.diff(log_nav, axis=0)])
+    valid = ~np.isnan(logret)
+    # demean before squaring so cumulative sums do not lose precision
+    centered = np.where(valid, logret - np.nanmean(logret, axis=0), 0.0)
+
+    results = {k: {} for k in ("return", "ann_return", "vol", "sharpe", "drawdown")}
+    for w in windows:
+        count = window_sum(valid.astype("float64"), w)
+        complete = count == w
+
+        s1 = window_sum(centered, w)
+        s2 = window_sum(centered ** 2, w)
+        var = (s2 - s1 ** 2 / w) / (w - 1) if w > 1 else np.full(nav.shape, np.nan)
+        vol = np.sqrt(np.clip(var, 0.0, None)) * np.sqrt(ppy)
+
+        log_growth = np.full(nav.shape, np.nan)
+        log_growth[w:] = log_nav[w:] - log_nav[:-w]
+        ret = np.expm1(log_growth)
+        ann_ret = np.expm1(log_growth * ppy / w)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = (ann_ret - risk_free_rate) / vol
+
+        drawdown = nav / rolling_max(nav, w + 1) - 1
+
+        for key, values in (
+            ("return", ret), ("ann_return", ann_ret), ("vol", vol),
+            ("sharpe", sharpe), ("drawdown", drawdown),
+        ):
+            results[key][w] = pd.DataFrame(
+                np.where(complete, values, np.nan), index=navs.index, columns=navs.columns
+            )
+
+    return {
+        key: pd.concat(frames, axis=1, names=["window", navs.columns.name or "strategy"])
+        for key, frames in results.items()
+    }
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from analytics.rolling import periods_per_year
+
+
+def build_trade_ledger(positions, close, fee=None, initial_capital=None, stop_logret=None):
+    """
+    Every round trip of every symbol, from the position and price matrices,
+    in one vectorized pass (diff + nonzero, no per-bar or per-trade loop).
+
+    Semantics follow BacktestEngine: the position on bar i earns the return
+    from close i-1 to close i and pays fee * |position change| on bar i.
+    A trade is a run of consecutive non-zero positions, so it opens at the
+    close before its first held bar and closes at the close before its first
+    flat bar; trades still open on the last bar are marked to that close.
+    A bar closed intrabar by a stop (see backtest.stops) ends its trade there,
+    at the exit price and with the exit fee on that bar.
+
+    Parameters:
+        positions (DataFrame): time x symbol exposure (engine 'positions')
+        close (DataFrame): time x symbol close prices, same shape
+        fee (float): proportional fee, defaults to cfg.FEE
+        initial_capital (float): starting NAV per symbol, defaults to cfg.INITIAL_CAPITAL
+        stop_logret (DataFrame): engine 'logreturns_stop', log return from the
+            previous close to the stop exit (NaN on other bars), None = no stops
+    Returns:
+        pd.DataFrame: one row per trade with symbol, entry_time, exit_time,
+        entry_price, exit_price, holding_bars, fees, log_return, return, pnl,
+        is_open, stopped
+    """
+    fee = cfg.FEE if fee is None else fee
+    initial_capital = cfg.INITIAL_CAPITAL if initial_capital is None else initial_capital
+    close = close.reindex(index=positions.index, columns=positions.columns)
+    index, symbols = positions.index, positions.columns
+
+    P = np.nan_to_num(positions.to_numpy(dtype="float64"))
+    C = close.to_numpy(dtype="float64")
+    T, N = P.shape
+    S = np.full((T, N), np.nan) if stop_logret is None else (
+        stop_logret.reindex(index=index, columns=symbols).to_numpy(dtype="float64")
+    )
+    stopped = ~np.isnan(S)
+
+    # per-bar strategy log return and fee, exactly as the engine books them
+    zero = np.zeros((1, N))
+    after = np.where(stopped, 0.0, P)                         # exposure left after the bar
+    before = np.vstack([zero, after[:-1]])
+    fees_bar = fee * (np.abs(P - before) + np.abs(P - after))
+    logret = np.vstack([zero, np.diff(np.log(C), axis=0)])
+    logret = np.where(stopped, S, logret)
+    contrib = np.nan_to_num(logret * P) - fees_bar
+    cum = np.vstack([zero, np.cumsum(contrib, axis=0)])      # cum[k] = sum of rows < k
+    cum_fee = np.vstack([zero, np.cumsum(fees_bar, axis=0)])
+
+    # first and last held bar of each trade, per symbol in time order
+    held = P != 0
+    next_flat = np.vstack([~held[1:], np.ones((1, N), dtype=bool)])
+    sym_in, entry = np.nonzero((held & (before == 0)).T)
+    sym_out, last_held = np.nonzero((held & (next_flat | stopped)).T)
+
+    by_stop = stopped[last_held, sym_out]
+    is_open = (last_held == T - 1) & ~by_stop
+    # exit fee is booked on the bar after the last held one, or on it for a stop
+    stop = np.where(is_open, T, np.where(by_stop, last_held + 1, last_held + 2))
+
+    log_return = cum[stop, sym_in] - cum[entry, sym_in]
+    entry_nav = initial_capital * np.exp(cum[entry, sym_in])
+    price_at = lambda rows: C[np.clip(rows, 0, T - 1), sym_in]
+
+    ledger = pd.DataFrame({
+        "symbol": symbols.to_numpy()[sym_in],
+        "entry_time": index[np.maximum(entry - 1, 0)],
+        "exit_time": index[last_held],
+        "entry_price": price_at(entry - 1),
+        "exit_price": np.where(by_stop, price_at(last_held - 1) * np.exp(S[last_held, sym_out]), price_at(last_held)),
+        "holding_bars": last_held - entry + 1,
+        "fees": cum_fee[stop, sym_in] - cum_fee[entry, sym_in],
+        "log_return": log_return,
+        "return": np.expm1(log_return),
+        "pnl": entry_nav * np.expm1(log_return),
+        "is_open": is_open,
+        "stopped": by_stop,
+    })
+    return ledger
+
+
+def ledger_from_results(strat_data, close=None, fee=None):
+    """
+    Trade ledger of a BacktestEngine.run() result ({symbol: DataFrame}).
+    Without `close` (time x symbol), prices are rebuilt from the stored asset
+    log returns and start at 1.0: returns and PnL are exact, prices relative.
+    """
+    positions = pd.DataFrame({sym: df["positions"] for sym, df in strat_data.items()})
+    if close is None:
+        logret = pd.DataFrame({sym: df["logreturns_asset"] for sym, df in strat_data.items()})
+        close = np.exp(logret.fillna(0.0).cumsum()).where(logret.notna() | logret.shift(-1).notna())
+    stop_logret = pd.DataFrame({sym: df.get("logreturns_stop", np.nan) for sym, df in strat_data.items()})
+    return build_trade_ledger(positions, close, fee=fee, stop_logret=stop_logret)
+
+
+def trade_summary(ledger, positions, include_open=True, granularity=None, stop_logret=None):
+    """
+    Hit rate, turnover and per-symbol attribution from a trade ledger.
+    Parameters:
+        ledger (DataFrame): build_trade_ledger output
+        positions (DataFrame): the positions the ledger was built from, for turnover
+        include_open (bool): count open trades (marked to market) in hit rate and PnL
+        stop_logret (DataFrame): the stop exits the ledger was built from, if any
+    Returns:
+        (dict, pd.DataFrame): portfolio totals, per-symbol attribution
+    """
+    trades = ledger if include_open else ledger[~ledger["is_open"]]
+    P = positions.fillna(0.0)
+    after = P if stop_logret is None else P.where(stop_logret.reindex_like(P).isna(), 0.0)
+    traded = (P - after.shift(1)).abs() + (P - after).abs()
+    traded.iloc[0] = P.iloc[0].abs() + (P.iloc[0] - after.iloc[0]).abs()
+    years = len(P) / periods_per_year(granularity or cfg.GRANULARITY)
+
+    by_symbol = trades.groupby("symbol").agg(
+        nb_trades=("return", "size"),
+        hit_rate=("return", lambda r: (r > 0).mean()),
+        avg_return=("return", "mean"),
+        total_pnl=("pnl", "sum"),
+        total_fees=("fees", "sum"),
+        avg_holding_bars=("holding_bars", "mean"),
+    )
+    by_symbol["turnover"] = traded.sum().reindex(by_symbol.index)
+    by_symbol["pnl_share"] = by_symbol["total_pnl"] / by_symbol["total_pnl"].abs().sum()
+
+    totals = {
+        "nb_trades": len(trades),
+        "nb_open": int(ledger["is_open"].sum()),
+        "hit_rate": float((trades["return"] > 0).mean()) if len(trades) else 0.0,
+        "average pnl": float(trades["pnl"].mean()) if len(trades) else 0.0,
+        "average return": float(trades["return"].mean()) if len(trades) else 0.0,
+        "average holding bars": float(trades["holding_bars"].mean()) if len(trades) else 0.0,
+        "turnover": float(traded.to_numpy().sum()),
+        "annual turnover": float(traded.to_numpy().sum() / years) if years > 0 else 0.0,
+    }
+    return totals, by_symbol
@@ -0,0 +1,262 @@
+import json
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from backtest.engine import BacktestEngine
+from backtest.parallel import ParallelBacktestEngine
+from strategies.breakout import BreakoutStrategy
+from strategies.cross_sectional import CrossSectionalMomentumStrategy
+from utils.helpers import granularity_to_pandas_freq
+from utils.journal import Journal
+
+
+@dataclass
+class EngineResult:
+    """
+    One engine's run in a common per-bar layout, so engines with different
+    bookkeeping (portfolio cash vs per-symbol NAVs) can be diffed bar by bar.
+
+    decision : time x symbol, signal (1 long / 0 flat) a rebalance acts on,
+               NaN on other bars
+    held     : time x symbol, 1.0 if exposed after the close of the bar
+    nav      : portfolio NAV normalized to 1.0 on the first bar
+    """
+    name: str
+    decision: pd.DataFrame
+    held: pd.DataFrame
+    nav: pd.Series
+    seconds: float = float("nan")
+
+
+# ---------- ADAPTERS ----------
+def run_old_engine(coin_data, config=cfg):
+    """old_run_backtest_breakout (portfolio with cash, 5/20 breakout on prior bars)."""
+    from old_breakout_strat import old_run_backtest_breakout
+
+    config = replace(config, JOURNAL_VERBOSITY="quiet", JOURNAL_PATH=None)
+    _, coin_data, strategy_data = old_run_backtest_breakout(config, coin_data=coin_data)
+    symbols = list(coin_data)
+    strat = strategy_data["strat"]
+    rebalance = strat.index.normalize().isin(
+        pd.date_range(config.START_DATE, config.END_DATE, freq=f"{config.FREQUENCY_DAYS}D")
+    )
+    signal = pd.DataFrame({sym: strategy_data[sym]["signal"].eq("LONG").astype(float) for sym in symbols})
+    held = pd.DataFrame({sym: (strategy_data[sym]["units"] > 0).astype(float) for sym in symbols})
+    signal[~rebalance] = np.nan
+    return EngineResult(
+        name="old_breakout_strat",
+        decision=signal,
+        held=held,
+        nav=strat["nav"] / strat["nav"].iloc[0],
+    )
+
+
+def run_backtest_engine(coin_data, config=cfg, strategy=None, name="BacktestEngine"):
+    """
+    BacktestEngine, by default with BreakoutStrategy(5, 20).
+    The position on bar t is entered at the close of t-1 on the signal of t-1,
+    so it is shifted back one bar to line up with the old engine's bookkeeping.
+    """
+    strategy = strategy or BreakoutStrategy(short_window=5, long_window=20, config=config)
+    engine = BacktestEngine(coin_data, strategy, config, journal=Journal(verbosity="quiet"))
+    return _engine_result(engine, engine.run(), config, name)
+
+
+def run_backtest_engine_chunked(coin_data, config=cfg, chunks=4, strategy=None, name="BacktestEngine.extend"):
+    """BacktestEngine run on the first chunk of dates, then extended chunk by chunk."""
+    dates = pd.date_range(config.START_DATE, config.END_DATE, freq=granularity_to_pandas_freq(config.GRANULARITY))
+    cuts = [dates[int(len(dates) * k / chunks)] for k in range(1, chunks)]
+    first = replace(config, END_DATE=cuts[0].date())
+    engine = BacktestEngine(
+        {sym: df[df.index < cuts[0] + pd.Timedelta(days=1)] for sym, df in coin_data.items()},
+        strategy or BreakoutStrategy(short_window=5, long_window=20, config=config),
+        first,
+        journal=Journal(verbosity="quiet"),
+    )
+    engine.run()
+    for end in cuts[1:] + [pd.Timestamp(config.END_DATE)]:
+        engine.extend(coin_data, end=end)
+    return _engine_result(engine, engine.strat_data, config, name)
+
+
+def run_backtest_engine_parallel(coin_data, config=cfg, workers=None, name="ParallelBacktestEngine"):
+    """BacktestEngine with the per-symbol simulation in a process pool (config.MAX_WORKERS by default)."""
+    engine = ParallelBacktestEngine(
+        coin_data,
+        BreakoutStrategy(short_window=5, long_window=20, config=config),
+        config,
+        journal=Journal(verbosity="quiet"),
+        workers=workers,
+    )
+    return _engine_result(engine, engine.run(), config, name)
+
+
+def _xs_coarse(config):
+    # 3d ranking bars do not divide the weekly rebalance: each rebalance ranks the last closed one
+    return CrossSectionalMomentumStrategy(top_k=2, lookback=3, timeframe="3d", config=replace(config, FREQUENCY_DAYS=7))
+
+
+def run_xs_coarse(coin_data, config=cfg):
+    """BacktestEngine with top-2 momentum on 3d bars, rebalanced weekly."""
+    config = replace(config, FREQUENCY_DAYS=7)
+    return run_backtest_engine(coin_data, config, _xs_coarse(config), name="BacktestEngine xs 3d")
+
+
+def run_xs_coarse_chunked(coin_data, config=cfg):
+    """run_xs_coarse, extended chunk by chunk."""
+    config = replace(config, FREQUENCY_DAYS=7)
+    return run_backtest_engine_chunked(coin_data, config, strategy=_xs_coarse(config), name="BacktestEngine.extend xs 3d")
+
+
+def _engine_result(engine, strat_data, config, name):
+    index = next(iter(strat_data.values())).index
+    rebalance = engine._is_rebalance(index, index[0])
+    decision = pd.DataFrame({sym: df["signals_df"] for sym, df in strat_data.items()}).astype(float).shift(1)
+    decision[~rebalance] = np.nan
+
+    positions = pd.DataFrame({sym: df["positions"] for sym, df in strat_data.items()})
+    navs = pd.DataFrame({sym: df["nav"] for sym, df in strat_data.items()})
+    nav = navs.fillna(config.INITIAL_CAPITAL).sum(axis=1)
+    return EngineResult(
+        name=name,
+        decision=decision,
+        held=(positions.shift(-1).ffill() > 0).astype(float),
+        nav=nav / nav.iloc[0],
+    )
+
+
+ENGINES = {
+    "old": run_old_engine,
+    "engine": run_backtest_engine,
+    "engine_chunked": run_backtest_engine_chunked,
+    "engine_parallel": run_backtest_engine_parallel,
+    "xs_coarse": run_xs_coarse,
+    "xs_coarse_chunked": run_xs_coarse_chunked,
+}
+
+
+# ---------- DATA ----------
+def synthetic_coin_data(n_symbols=5, config=cfg, seed=0, listing_spread=0.3):
+    """
+    Deterministic OHLCV random walks on the config grid, with listings
+    staggered over the first `listing_spread` of the period so partial
+    histories are exercised as well.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(
+        pd.Timestamp(config.START_DATE), pd.Timestamp(config.END_DATE),
+        freq=granularity_to_pandas_freq(config.GRANULARITY),
+    )
+    coin_data = {}
+    for i in range(n_symbols):
+        start = 0 if i == 0 else int(rng.integers(0, max(1, int(len(dates) * listing_spread))))
+        idx = dates[start:]
+        logret = rng.normal(0.0, 0.03, len(idx)) + 0.002 * np.sin(np.arange(len(idx)) / 15)
+        close = 100 * np.exp(np.cumsum(logret))
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        wick = np.abs(rng.normal(0, 0.01, (2, len(idx))))
+        coin_data[f"SYN{i:03d}USDT"] = pd.DataFrame(
+            {
+                "open": open_,
+                "high": np.maximum(open_, close) * (1 + wick[0]),
+                "low": np.minimum(open_, close) * (1 - wick[1]),
+                "close": close,
+                "volume": rng.uniform(1e3, 1e5, len(idx)),
+            },
+            index=pd.DatetimeIndex(idx, name="date"),
+        )
+    return coin_data
+
+
+# ---------- COMPARE ----------
+def timed(run, coin_data, config, repeat=1) -> EngineResult:
+    """Run an adapter `repeat` times, keep the fastest wall time."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = run(coin_data, config)
+        best = min(best, time.perf_counter() - t0)
+    result.seconds = best
+    return result
+
+
+def _diff(a: pd.DataFrame, b: pd.DataFrame, tol: float):
+    """Bars x symbols where |a - b| > tol (NaN on both sides is equal)."""
+    a, b = a.align(b, join="outer")
+    both_nan = a.isna() & b.isna()
+    gap = (a - b).abs()
+    return ((gap > tol) | (a.isna() ^ b.isna())) & ~both_nan, gap
+
+
+def compare(reference: EngineResult, candidate: EngineResult, signal_tol=0.0, position_tol=0.0, nav_tol=1e-9) -> dict:
+    """
+    Per-bar differences of a candidate engine against a reference.
+    Returns:
+        dict: per field ('decision', 'held', 'nav') the number of differing
+              bars, the first one and the largest gap; plus the speedup
+              (reference seconds / candidate seconds) and an overall 'equivalent'.
+              Boolean difference frames are under '_frames'.
+    """
+    report, frames = {}, {}
+    for field_name, tol in (("decision", signal_tol), ("held", position_tol)):
+        diff, gap = _diff(getattr(reference, field_name), getattr(candidate, field_name), tol)
+        bars = diff.any(axis=1)
+        frames[field_name] = diff
+        report[field_name] = {
+            "bars": int(bars.sum()),
+            "cells": int(diff.to_numpy().sum()),
+            "first": str(bars.idxmax()) if bars.any() else None,
+            "max_gap": float(np.nan_to_num(gap.to_numpy(), nan=0.0).max()) if gap.size else 0.0,
+        }
+    nav_diff, nav_gap = _diff(reference.nav.to_frame("nav"), candidate.nav.to_frame("nav"), nav_tol)
+    frames["nav"] = nav_diff["nav"]
+    report["nav"] = {
+        "bars": int(nav_diff["nav"].sum()),
+        "first": str(nav_diff["nav"].idxmax()) if nav_diff["nav"].any() else None,
+        "max_gap": float(nav_gap["nav"].max()),
+        "final": [float(reference.nav.iloc[-1]), float(candidate.nav.iloc[-1])],
+    }
+    report["equivalent"] = all(report[k]["bars"] == 0 for k in ("decision", "held", "nav"))
+    report["seconds"] = [reference.seconds, candidate.seconds]
+    report["speedup"] = reference.seconds / candidate.seconds if candidate.seconds > 0 else float("nan")
+    report["_frames"] = frames
+    return report
+
+
+def run_harness(datasets: dict, engines=("old", "engine"), config=cfg, repeat=1, out=None, **tolerances) -> list:
+    """
+    Run every engine on every dataset, diff each against the first engine and
+    print one line per pair. With `out`, reports are appended as JSON lines
+    so speedups can be tracked over time.
+    Parameters:
+        datasets (dict): {name: {symbol: OHLCV DataFrame}}
+        engines (iterable): ENGINES keys or (name, adapter) pairs, first is the reference
+    """
+    engines = [(e, ENGINES[e]) if isinstance(e, str) else e for e in engines]
+    reports = []
+    for data_name, coin_data in datasets.items():
+        results = [(name, timed(run, coin_data, config, repeat)) for name, run in engines]
+        ref_name, ref = results[0]
+        for name, res in results[1:]:
+            rep = compare(ref, res, **tolerances)
+            status = "✅ equivalent" if rep["equivalent"] else "❌ differs"
+            print(
+                f"{data_name:>10} | {ref_name} vs {name}: {status} | "
+                f"decision {rep['decision']['bars']} bars (first {rep['decision']['first']}), "
+                f"held {rep['held']['bars']}, nav {rep['nav']['bars']} (max gap {rep['nav']['max_gap']:.3g}) | "
+                f"{ref.seconds:.3f}s vs {res.seconds:.3f}s, speedup x{rep['speedup']:.2f}"
+            )
+            reports.append({"dataset": data_name, "reference": ref_name, "candidate": name, **rep})
+
+    if out is not None:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "a") as f:
+            for rep in reports:
+                record = {k: v for k, v in rep.items() if k != "_frames"}
+                f.write(json.dumps({"at": pd.Timestamp.now().isoformat(), **record}, default=str) + "\n")
+    return reports
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from analytics.rolling import periods_per_year
+
+
+def _gross_and_turnover(strat_data):
+    """Fee-free strategy log returns and |position change|, both time x symbol."""
+    positions = pd.DataFrame({sym: df["positions"] for sym, df in strat_data.items()}).fillna(0.0)
+    logret = pd.DataFrame({sym: df["logreturns_asset"] for sym, df in strat_data.items()})
+    # bars closed intrabar by a stop earn up to the exit price and trade out on the same bar
+    stop = pd.DataFrame({sym: df.get("logreturns_stop", np.nan) for sym, df in strat_data.items()}).reindex_like(positions)
+    gross = (stop.fillna(logret) * positions).fillna(0.0)
+    after = positions.where(stop.isna(), 0.0)
+    turnover = (positions - after.shift(1)).abs() + (positions - after).abs()
+    turnover.iloc[0] = positions.iloc[0].abs() + (positions.iloc[0] - after.iloc[0]).abs()
+    return gross, turnover
+
+
+def _break_even(gross_total, turnover_total, tol=1e-12, n_iter=100):
+    """
+    Cost c at which sum_n exp(G_n - c U_n) equals the number of symbols,
+    i.e. the equal-capital portfolio ends flat. Decreasing in c, so Newton
+    from c = 0 converges monotonically. NaN if already losing before costs
+    or if nothing trades.
+    """
+    n = len(gross_total)
+    if turnover_total.sum() == 0 or np.exp(gross_total).sum() <= n:
+        return np.nan
+    c = 0.0
+    for _ in range(n_iter):
+        terms = np.exp(gross_total - c * turnover_total)
+        step = (terms.sum() - n) / (terms * turnover_total).sum()
+        c += step
+        if abs(step) < tol:
+            break
+    return c
+
+
+def cost_sensitivity(strat_data, fees, slippage=0.0, config=cfg, risk_free_rate=0.05, return_navs=False):
+    """
+    NAV and metrics of a BacktestEngine run for a whole vector of cost
+    levels at once, from that single simulation.
+
+    Positions of the per-symbol engine do not depend on fees, so for a cost
+    c per unit traded the strategy log return is gross - c * |trade| on every
+    bar; all levels are evaluated by broadcasting over the trade array.
+    Not valid for old_run_backtest_breakout, where fees change cash and sizing.
+
+    Parameters:
+        strat_data (dict): {symbol: DataFrame} from BacktestEngine.run()
+        fees (array-like): fee levels, proportional per unit traded
+        slippage (float | array-like): slippage levels, broadcast with `fees`
+        return_navs (bool): also return the time x cost portfolio NAVs
+    Returns:
+        (pd.DataFrame, dict[, pd.DataFrame]):
+            cost curve indexed by level (fee, slippage, cost, total_return,
+            ann_return, ann_vol, sharpe, max_drawdown, total_fees),
+            break-even costs {'portfolio': c, symbol: c},
+            portfolio NAVs if requested
+    """
+    fee, slip = np.broadcast_arrays(np.atleast_1d(np.asarray(fees, dtype="float64")),
+                                    np.asarray(slippage, dtype="float64"))
+    fee, slip = fee.ravel(), slip.ravel()
+    cost = fee + slip
+
+    gross, turnover = _gross_and_turnover(strat_data)
+    G = gross.to_numpy()
+    U = turnover.to_numpy()
+    cum_g = np.cumsum(G, axis=0)                       # T x N
+    cum_u = np.cumsum(U, axis=0)
+
+    # T x K portfolio NAV: sum over symbols of capital * exp(cum_g - c * cum_u)
+    navs = np.einsum(
+        "tkn->tk",
+        config.INITIAL_CAPITAL * np.exp(cum_g[:, None, :] - cost[None, :, None] * cum_u[:, None, :]),
+    )
+    start = config.INITIAL_CAPITAL * G.shape[1]
+    ppy = periods_per_year(config.GRANULARITY)
+    years = (len(G) - 1) / ppy
+
+    logret = np.diff(np.log(navs), axis=0)
+    total = navs[-1] / start - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ann_return = (1 + total) ** (1 / years) - 1 if years > 0 else np.zeros_like(total)
+        vol = logret.std(axis=0, ddof=1) * np.sqrt(ppy)
+        sharpe = np.where(vol > 0, (ann_return - risk_free_rate) / vol, 0.0)
+    peak = np.maximum.accumulate(np.vstack([np.full((1, len(cost)), start), navs]), axis=0)[1:]
+    # fees paid: capital-weighted turnover cost, bar by bar
+    nav_before = config.INITIAL_CAPITAL * np.exp(
+        np.vstack([np.zeros((1, G.shape[1])), cum_g[:-1]])[:, None, :]
+        - cost[None, :, None] * np.vstack([np.zeros((1, G.shape[1])), cum_u[:-1]])[:, None, :]
+    )
+    total_fees = (nav_before * cost[None, :, None] * U[:, None, :]).sum(axis=(0, 2))
+
+    curve = pd.DataFrame({
+        "fee": fee,
+        "slippage": slip,
+        "cost": cost,
+        "total_return": total,
+        "ann_return": ann_return,
+        "ann_vol": vol,
+        "sharpe": sharpe,
+        "max_drawdown": (navs / peak - 1).min(axis=0),
+        "total_fees": total_fees,
+    })
+
+    g_total, u_total = G.sum(axis=0), U.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_symbol = np.where(u_total > 0, g_total / u_total, np.nan)
+    break_even = {"portfolio": _break_even(g_total, u_total)}
+    break_even.update({sym: float(c) if c > 0 else np.nan for sym, c in zip(gross.columns, per_symbol)})
+
+    if return_navs:
+        return curve, break_even, pd.DataFrame(navs, index=gross.index, columns=cost)
+    return curve, break_even
@@ -1,18 +1,128 @@
+from dataclasses import dataclass, field
 from datetime import timedelta
 import pandas as pd
 import numpy as np
 from config import cfg
+from utils.journal import Journal
+from data.listing import ListingIndex
+from backtest.timeframes import resample_ohlcv, bar_index_map, broadcast
+from backtest.stops import apply_stops
+from analytics.online import OnlineMetrics
+from utils.helpers import granularity_to_timedelta
+
+
+def _stops_enabled(config):
+    return any(level is not None for level in (config.STOP_LOSS, config.TAKE_PROFIT, config.TRAILING_STOP))
+
+
+def simulate_arrays(config, signal, bars, is_rebalance, last_signal, last_position, last_close, cum_logret, stops=None):
+    """
+    Array core of BacktestEngine._simulate, free of pandas so worker
+    processes (backtest.parallel) can run it on shared-memory views.
+    Parameters:
+        signal (np.ndarray): signal per grid date
+        bars (dict): {'close': array}, plus 'open' / 'high' / 'low' when stops are set
+        is_rebalance (np.ndarray): bool per grid date
+    Returns:
+        (dict, dict): {column: array} of the strat_data frame, end state
+    """
+    close = bars["close"]
+    n = len(signal)
+
+    prev_signal = np.empty(n)
+    prev_signal[:1] = last_signal
+    prev_signal[1:] = signal[:-1]
+    switch = is_rebalance & ((prev_signal == 0) | (prev_signal == 1))
+    # forward fill of the rebalance decisions, seeded with the previous position
+    filled = np.maximum.accumulate(np.where(switch, np.arange(n), -1))
+    positions = np.where(filled >= 0, prev_signal[np.maximum(filled, 0)], last_position)
+    target = positions
+
+    log_close = np.log(close)
+    logreturns_asset = np.empty(n)
+    logreturns_asset[:1] = log_close[:1] - np.log(last_close)
+    logreturns_asset[1:] = np.diff(log_close)
+    logreturns_stop = np.full(n, np.nan)
+    stop_state = None
+    if _stops_enabled(config):
+        prev_close = np.append(last_close, close[:-1])
+        positions, logreturns_stop, stop_state = apply_stops(
+            positions, is_rebalance, bars["open"], bars["high"], bars["low"], prev_close,
+            config.STOP_LOSS, config.TAKE_PROFIT, config.TRAILING_STOP, carry=stops,
+        )
+
+    # exposure left after each bar: none once a stop closed it intrabar
+    stopped = ~np.isnan(logreturns_stop)
+    after = np.where(stopped, 0.0, positions)
+    last_exposure = 0.0 if stops and stops["stopped"] else last_position
+    trade = positions - np.append(last_exposure, after[:-1])
+    fee = config.FEE*(np.abs(trade) + np.abs(positions - after))
+    logreturns_strat = np.where(stopped, logreturns_stop, logreturns_asset)*positions-fee
+    # running sum seeded with the previous total, so chunks add up exactly as one cumsum;
+    # bars without a return (not listed yet) are skipped and stay NaN
+    cum = np.nancumsum(np.append(cum_logret, logreturns_strat))
+    nav = config.INITIAL_CAPITAL * np.exp(np.where(np.isnan(logreturns_strat), np.nan, cum[1:]))
+
+    columns = {
+        "nav": nav,
+        "signals_df": signal,
+        "positions": positions,
+        "fee": fee,
+        "logreturns_strat": logreturns_strat,
+        "logreturns_asset": logreturns_asset,
+        "logreturns_stop": logreturns_stop,
+    }
+    end = {
+        "last_signal": signal[-1],
+        "last_position": target[-1],
+        "last_close": close[-1],
+        "cum_logret": cum[-1],
+        "stops": stop_state,
+    }
+    return columns, end
+
+
+@dataclass
+class EngineState:
+    """
+    Compact end-of-run snapshot, enough for BacktestEngine.extend to continue
+    a run exactly as a full rerun would.
+    """
+    anchor: pd.Timestamp             # first grid date, rebalance calendar origin
+    last_time: pd.Timestamp          # last grid date simulated
+    freq: str                        # grid frequency
+    sim_tail: dict = field(default_factory=dict)      # {sym: last rows of coin_data_for_sim}
+    last_signal: dict = field(default_factory=dict)   # {sym: signal at last_time}
+    last_position: dict = field(default_factory=dict)
+    last_close: dict = field(default_factory=dict)
+    cum_logret: dict = field(default_factory=dict)    # {sym: running sum of strategy log returns}
+    stops: dict = field(default_factory=dict)         # {sym: open holding period's entry, peak, stopped flag}
+    listing: ListingIndex = None     # point-in-time tradability, grown by extend
+    metrics: dict = field(default_factory=dict)       # {sym: OnlineMetrics of its NAV}
+    portfolio: OnlineMetrics = None  # of the summed NAV (symbols' last NAV, INITIAL_CAPITAL before it)
+
 
 class BacktestEngine:
     """
     Generic backtest engine for systematic strategies.
     """
 
-    def __init__(self, coin_data, strategy, config):
+    def __init__(self, coin_data, strategy, config, journal=None, listing=None):
         self.coin_data = coin_data
         self.strategy = strategy
         self.config = config
+        # symbols are only held once listed with MIN_HISTORY_BARS bars, and not after their last bar;
+        # without a listing (ListingIndex.for_config), frames are taken as cut at START_DATE
+        self.listing = listing or ListingIndex.from_coin_data(
+            coin_data, config.MIN_HISTORY_BARS, history_start=config.START_DATE
+        )
+        # an own journal is closed after each run (file finalized, replaced by the next run);
+        # a passed one is only flushed, its owner closes it
+        self._own_journal = journal is None
+        self.journal = journal or Journal(config.JOURNAL_PATH, verbosity=config.JOURNAL_VERBOSITY)
         self.all_dates = self._generate_all_dates()
+        self.strat_data = {}
+        self.state = None
 
     def _generate_all_dates(self):
         freq = self._granularity_to_pandas_freq(self.config.GRANULARITY)
@@ -57,97 +167,350 @@ class BacktestEngine:
                 signal=""
             )
 
-    def run(self):
+    @staticmethod
+    def _align_to_grid(df, grid):
+        """As-of (backward) merge of raw bars onto the date grid."""
+        if df.index.is_monotonic_increasing and df.index.is_unique:
+            # same rows as merge_asof, by binary search on the sorted index
+            return df.reindex(pd.DatetimeIndex(grid), method="pad").rename_axis("timestamp")
+
+        # Reset index as explicit column to be able to usemerge_asof (index doesnot work)
+        df_reset = df.reset_index().rename(columns={df.index.name or "index": "timestamp"})
+        target = pd.DataFrame({"timestamp": grid})
+
+        # As-of merge
+        # index name = 'timestamp'
+        # original timestamps of df_reset are dropped
+        return pd.merge_asof(
+            target,
+            df_reset,
+            on="timestamp",
+            direction="backward",   # ← latest past observation
+            allow_exact_matches=True
+        ).set_index("timestamp")
+
+    def _is_rebalance(self, index, anchor):
+        """Grid dates falling on the FREQUENCY_DAYS calendar that starts at `anchor`."""
+        offset = (index - anchor).asi8
+        step = pd.Timedelta(days=self.config.FREQUENCY_DAYS).value
+        return (offset >= 0) & (offset % step == 0)
+
+    def _simulate(self, sim_df, signals_df, is_rebalance, last_signal, last_position, last_close, cum_logret, stops=None):
         """
-        Run the backtest for all dates
+        Vectorized simulation of one symbol over consecutive grid dates,
+        continuing from the previous bar's signal, position, close and
+        cumulative strategy log return.
+        Position changes only on rebalance dates, to the previous bar's signal.
+        With STOP_LOSS / TAKE_PROFIT / TRAILING_STOP set, holding periods are
+        also closed intrabar (see backtest.stops), and stay flat until the
+        next rebalance; `stops` carries an open period across chunks.
         """
-        rebalance_dates = pd.date_range(
-            start=self.all_dates[0],
-            end=self.all_dates[-1],
-            freq=f"{cfg.FREQUENCY_DAYS}D"
+        bars = {"close": sim_df["close"].to_numpy(dtype="float64")}
+        if _stops_enabled(self.config):
+            bars.update({col: sim_df[col].to_numpy(dtype="float64") for col in ("open", "high", "low")})
+        columns, end = simulate_arrays(
+            self.config, signals_df.to_numpy(dtype="float64"), bars, np.asarray(is_rebalance),
+            last_signal, last_position, last_close, cum_logret, stops,
         )
+        return pd.DataFrame(columns, index=signals_df.index), end
 
-        coin_data_for_sim = {}
-        strat_data={}
+    def _mask_untradable(self, signals, listing):
+        """Signals forced to 0 (flat) wherever the listing index says the symbol is not tradable."""
+        masked = {}
+        grid = next(iter(signals.values())).index if signals else None
+        mask = listing.mask(grid, list(signals)) if signals else None   # one pass when all share the grid
+        for sym, sig in signals.items():
+            if sig.index.equals(grid):
+                tradable = mask[sym].to_numpy()
+            else:
+                tradable = listing.mask(sig.index, [sym])[sym].to_numpy()
+            masked[sym] = pd.Series(np.where(tradable, sig.to_numpy(dtype="float64"), 0.0), index=sig.index, name=sig.name)
+        return masked
+
+    def _signal_timeframe(self):
+        """Strategy bar size when coarser than the grid, None when it runs on the grid itself."""
+        timeframe = getattr(self.strategy, "timeframe", None)
+        if timeframe is None:
+            return None
+        coarse = granularity_to_timedelta(timeframe)
+        fine = granularity_to_timedelta(self.config.GRANULARITY)
+        if coarse == fine:
+            return None
+        if coarse < fine or coarse % fine:
+            raise ValueError(
+                f"Strategy timeframe {timeframe} must be a multiple of GRANULARITY {self.config.GRANULARITY}; "
+                "for finer signals run the grid at the signal timeframe and rebalance every FREQUENCY_DAYS"
+            )
+        return coarse
+
+    def _generate_signals(self, coin_data_for_sim, anchor, indicators=None, listing=None):
+        """
+        Strategy signals on the grid. A strategy with a coarser `timeframe` gets
+        bars resampled from the grid (bins anchored at `anchor`), and its signals
+        are broadcast back through one precomputed coarse -> grid index map,
+        each coarse bar visible from its last grid bar on (no look-ahead).
+        A shared IndicatorGraph over the grid data is only used on the grid.
+        A cross-sectional strategy also gets the `listing` tradability of each
+        of its bars, so it only ranks symbols that can be held.
+        """
+        coarse = self._signal_timeframe()
+        if coarse is None:
+            kwargs = self._tradable_kwargs(coin_data_for_sim, listing)
+            if indicators is not None:
+                kwargs["indicators"] = indicators
+            return self.strategy.generate_signals(coin_data_for_sim, **kwargs)
+
+        fine = granularity_to_timedelta(self.config.GRANULARITY)
+        bars = {sym: resample_ohlcv(df, coarse, anchor) for sym, df in coin_data_for_sim.items()}
+        coarse_signals = self.strategy.generate_signals(bars, **self._tradable_kwargs(bars, listing, coarse - fine))
+
+        maps = {}  # all symbols share the grid, so usually a single map
+        signals = {}
+        for sym, df in coin_data_for_sim.items():
+            coarse_index = bars[sym].index
+            key = (len(df), df.index[:1].asi8.tobytes(), len(coarse_index), coarse_index[:1].asi8.tobytes())
+            if key not in maps:
+                maps[key] = bar_index_map(df.index, fine, coarse_index, coarse)
+            sig = coarse_signals[sym]
+            values = sig.reindex(coarse_index).to_numpy() if len(sig) else np.zeros(0)
+            signals[sym] = pd.Series(broadcast(values, maps[key]), index=df.index, name=sig.name)
+        return signals
+
+    def _tradable_kwargs(self, data, listing, visible_after=None):
+        """
+        {'tradable': time x symbol mask} for a cross-sectional strategy, taken
+        at the grid bar each signal is visible from (bar + visible_after).
+        """
+        if listing is None or not getattr(self.strategy, "cross_sectional", False) or not data:
+            return {}
+        index = max((df.index for df in data.values()), key=len)
+        mask = listing.mask(index if visible_after is None else index + visible_after, list(data))
+        mask.index = index
+        return {"tradable": mask}
+
+    def _warmup_rows(self):
+        """Rows of aligned history the strategy needs to extend signals; None = all."""
+        warmup = getattr(self.strategy, "warmup_bars", None)
+        coarse = self._signal_timeframe()
+        if warmup is None or coarse is None:
+            return warmup
+        # warmup coarse bars, plus the partial bins at both ends of the kept tail
+        return (warmup + 2) * int(coarse // granularity_to_timedelta(self.config.GRANULARITY))
+
+    def align(self):
+        """{symbol: DataFrame} of the raw bars as-of merged onto all_dates."""
+        all_dates = pd.DatetimeIndex(self.all_dates).sort_values()
+        return {sym: self._align_to_grid(df, all_dates) for sym, df in self.coin_data.items()}
+
+    def run(self, coin_data_for_sim=None, signals=None, indicators=None):
+        """
+        Run the backtest for all dates.
+        Parameters:
+            coin_data_for_sim (dict): output of align(), recomputed if None
+            signals (dict): strategy signals on that data, recomputed if None
+            indicators (IndicatorGraph): graph over coin_data_for_sim shared with
+                                         other runs, so common indicators are reused
+        Returns:
+            dict: {symbol: DataFrame} of nav, signals, positions, fee and log returns
+        """
         all_dates = pd.DatetimeIndex(self.all_dates).sort_values()
+        anchor = all_dates[0]
 
         #creates coin_data_df with all_dates timestamps only
-        for sym, df in self.coin_data.items():
+        if coin_data_for_sim is None:
+            coin_data_for_sim = self.align()
+
+        self.journal.record("run_start", time=anchor, strategy=self._strategy_name())
+        if signals is None:
+            signals=self._generate_signals(coin_data_for_sim, anchor, indicators, self.listing)
+        signals = self._mask_untradable(signals, self.listing)
+        is_rebalance = self._is_rebalance(all_dates, anchor)
+
+        self.state = EngineState(
+            anchor=anchor, last_time=all_dates[-1], freq=self.all_dates.freqstr, listing=self.listing
+        )
+        strat_data = self._simulate_symbols(coin_data_for_sim, signals, is_rebalance)
 
-            # Reset index as explicit column to be able to usemerge_asof (index doesnot work)
-            df_reset = df.reset_index().rename(columns={"date": "timestamp"})
-            target = pd.DataFrame({"timestamp": all_dates})
-
-            # As-of merge
-            # index name = 'timestamp'
-            # original timestamps of df_reset are dropped
-            coin_data_for_sim_df = pd.merge_asof(
-                target,
-                df_reset,
-                on="timestamp",
-                direction="backward",   # ← latest past observation
-                allow_exact_matches=True
-            ).set_index("timestamp")
-            coin_data_for_sim[sym] = coin_data_for_sim_df
-
-        signals=self.strategy.generate_signals(coin_data_for_sim)
-        
+        self.strat_data = strat_data
+        self._update_metrics(strat_data)
+        self._journal_run(strat_data)
+
+        return strat_data
+
+    def _simulate_symbols(self, coin_data_for_sim, signals, is_rebalance):
+        """Every symbol simulated over the whole grid from a flat start; end states saved for extend()."""
+        strat_data={}
+        warmup = self._warmup_rows()
         for sym in self.coin_data:
+            coin_data_for_sim_df=coin_data_for_sim[sym]
+            signals_df=signals[sym]
 
-            strat_data_df = pd.DataFrame(
+            # first bar: flat, nothing to trade or earn yet
+            first = pd.DataFrame(
                 {
-                    "signals":0,
-                    "position": 0,
-                    "trade": 0,
-                    "fee":0,                    
-                    "nav":0
+                    "nav": np.nan,
+                    "signals_df": signals_df.iloc[:1],
+                    "positions": 0.0,
+                    "fee": np.nan,
+                    "logreturns_strat": np.nan,
+                    "logreturns_asset": np.nan,
+                    "logreturns_stop": np.nan,
                 },
-                index=coin_data_for_sim_df.index,
+                index=signals_df.index[:1],
             )
-            coin_data_for_sim_df=coin_data_for_sim[sym]
-            signals_df=signals[sym]
-            positions = pd.Series(index=signals_df.index, dtype="float64")
-            positions.iloc[0] = 0
-
-            is_rebalance = signals_df.index.isin(rebalance_dates)
-            prev_signal = signals_df.shift(1)
-
-            for i in range(1, len(signals_df)):
-                positions.iloc[i] = (
-                    1 if (is_rebalance[i] and prev_signal.iloc[i] == 1)
-                    else 0 if (is_rebalance[i] and prev_signal.iloc[i] == 0)
-                    else positions.iloc[i - 1]
-                )
-
-            trade=positions.diff()
-            fee=cfg.FEE*trade.abs()
-            logreturns_asset=np.log(coin_data_for_sim_df['close']).diff()
-            logreturns_strat=logreturns_asset*positions-fee
-            nav = cfg.INITIAL_CAPITAL * np.exp(logreturns_strat.cumsum())
-
-            strat_data_df = pd.concat(
-                    [
-                        nav,
-                        signals_df,
-                        positions,
-                        fee,
-                        logreturns_strat,
-                        logreturns_asset
-                    ],
-                axis=1,
-                keys=[
-                    "nav",
-                    "signals_df",
-                    "positions",
-                    "fee",                    
-                    "logreturns_strat",
-                    "logreturns_asset"
-                ]
+            rest, end = self._simulate(
+                coin_data_for_sim_df.iloc[1:],
+                signals_df.iloc[1:],
+                is_rebalance[1:],
+                last_signal=signals_df.iloc[0],
+                last_position=0.0,
+                last_close=coin_data_for_sim_df['close'].iloc[0],
+                cum_logret=0.0,
             )
-            strat_data[sym]=strat_data_df
+            strat_data[sym] = pd.concat([first, rest])
+            self._save_end_state(sym, coin_data_for_sim_df, end, warmup)
+        return strat_data
 
+    def _strategy_name(self):
+        return getattr(self.strategy, "name", type(self.strategy).__name__)
+
+    def _journal_run(self, strat_data):
+        """One summary record per symbol and for the run; the full frames only at 'bars' verbosity."""
+        journal = self.journal
+        name = self._strategy_name()
+        final_nav = 0.0
+        for sym, df in strat_data.items():
+            nav = df["nav"].to_numpy()
+            nav = nav[~np.isnan(nav)]
+            nav = nav[-1] if len(nav) else self.config.INITIAL_CAPITAL
+            final_nav += nav
+            journal.record(
+                "symbol_done", time=df.index[-1], symbol=sym, strategy=name,
+                nav=float(nav), nb_trades=int(np.count_nonzero(np.nan_to_num(np.diff(df["positions"].to_numpy())))),
+            )
+        journal.record("run_end", time=self.state.last_time, strategy=name, nav=float(final_nav))
+        if journal.enabled("frame"):
+            journal.record("frame", frame=strat_data)
+        if self._own_journal:
+            journal.close()
+        else:
+            journal.flush()
+
+    def _update_metrics(self, rows):
+        """Fold newly simulated rows into the running per-symbol and portfolio metrics."""
+        state = self.state
+        capital = self.config.INITIAL_CAPITAL
+        if state.portfolio is None:
+            state.portfolio = OnlineMetrics(self.config.GRANULARITY)
+        index = next(iter(rows.values())).index if rows else None
+        portfolio = np.zeros(len(index)) if rows else None
+        cash = np.zeros(len(index)) if rows else None
+        for sym, df in rows.items():
+            acc = state.metrics.setdefault(sym, OnlineMetrics(self.config.GRANULARITY))
+            nav = df["nav"].to_numpy()
+            positions = df["positions"].to_numpy()
+            # portfolio NAV carries each symbol's last NAV over gaps, INITIAL_CAPITAL before its first
+            valid = np.maximum.accumulate(np.where(np.isnan(nav), -1, np.arange(len(nav))))
+            held = np.where(valid >= 0, nav[np.maximum(valid, 0)], capital if np.isnan(acc.last_nav) else acc.last_nav)
+            portfolio += held
+            cash += held * (1 - np.abs(positions))
+            acc.update_many(nav, positions, times=df.index)
+        if rows:
+            state.portfolio.update_many(portfolio, cash=cash, times=index)
+
+    def _save_end_state(self, sym, sim_df, end, warmup):
+        self.state.sim_tail[sym] = sim_df if warmup is None else sim_df.iloc[-warmup:]
+        self.state.last_signal[sym] = end["last_signal"]
+        self.state.last_position[sym] = end["last_position"]
+        self.state.last_close[sym] = end["last_close"]
+        self.state.cum_logret[sym] = end["cum_logret"]
+        self.state.stops[sym] = end["stops"]
+
+    def extend(self, new_bars, end=None):
+        """
+        Continue the last run (or a loaded state) with newly arrived bars,
+        at a cost proportional to the new data.
+
+        Parameters:
+            new_bars (dict): {symbol: OHLCV DataFrame} bars after the last run,
+                             earlier rows are ignored
+            end: last grid date to simulate, defaults to the latest new bar
+        Returns:
+            dict: {symbol: DataFrame} rows for the new grid dates only,
+                  identical to the same rows of a full rerun
+        """
+        if self.state is None:
+            raise RuntimeError("No state to extend: call run() or load_state() first")
+        state = self.state
+
+        if end is None:
+            end = max(df.index.max() for df in new_bars.values() if not df.empty)
+        new_dates = pd.date_range(
+            start=state.last_time + pd.tseries.frequencies.to_offset(state.freq),
+            end=pd.Timestamp(end),
+            freq=state.freq,
+        )
+        if new_dates.empty:
+            return {}
+
+        # raw bars after the last grid date, seeded with the last aligned row for the as-of merge
+        coin_data_for_sim = {}
+        for sym, tail in state.sim_tail.items():
+            bars = new_bars.get(sym, tail.iloc[:0])
+            bars = bars[bars.index > state.last_time]
+            seed = tail.iloc[-1:].rename_axis(bars.index.name or "date")
+            merged = self._align_to_grid(pd.concat([seed, bars[tail.columns]]), new_dates)
+            coin_data_for_sim[sym] = pd.concat([tail, merged])
+
+        state.listing = state.listing.update(new_bars)
+        signals = self._generate_signals(coin_data_for_sim, state.anchor, listing=state.listing)
+        signals = self._mask_untradable(signals, state.listing)
+        is_rebalance = self._is_rebalance(new_dates, state.anchor)
+
+        warmup = self._warmup_rows()
+        new_rows = {}
+        for sym, sim_df in coin_data_for_sim.items():
+            # new dates are the last rows of the tail + new bars frame
+            rows, end_state = self._simulate(
+                sim_df.iloc[-len(new_dates):],
+                signals[sym].iloc[-len(new_dates):],
+                is_rebalance,
+                last_signal=state.last_signal[sym],
+                last_position=state.last_position[sym],
+                last_close=state.last_close[sym],
+                cum_logret=state.cum_logret[sym],
+                stops=state.stops.get(sym),
+            )
+            new_rows[sym] = rows
+            self._save_end_state(sym, sim_df, end_state, warmup)
+            if sym in self.strat_data:
+                self.strat_data[sym] = pd.concat([self.strat_data[sym], rows])
+
+        state.last_time = new_dates[-1]
+        self._update_metrics(new_rows)
+        return new_rows
+
+    def summary(self) -> dict:
+        """
+        Metrics of everything simulated so far, from the running accumulators
+        (no pass over the history, so cheap after every extend()).
+        Returns:
+            dict: {'portfolio' | symbol: nav_summary keys, cash share, opened / closed}
+        """
+        if self.state is None or self.state.portfolio is None:
+            return {}
+        by_symbol = {sym: acc.summary() for sym, acc in self.state.metrics.items()}
+        portfolio = self.state.portfolio.summary()
+        if portfolio:
+            portfolio["opened"] = sum(acc.opened for acc in self.state.metrics.values())
+            portfolio["closed"] = sum(acc.closed for acc in self.state.metrics.values())
+        return {"portfolio": portfolio, **by_symbol}
 
+    def save_state(self, path):
+        """Persist the end-of-run snapshot."""
+        pd.to_pickle(self.state, path)
 
-        print(strat_data)
-        
-        return logreturns_strat
\ No newline at end of file
+    def load_state(self, path):
+        """Load a snapshot written by save_state, to extend() without rerunning."""
+        self.state = pd.read_pickle(path)
+        return self.state
@@ -0,0 +1,129 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import BacktestEngine, simulate_arrays, _stops_enabled
+
+# strat_data columns, in BacktestEngine order
+COLUMNS = ["nav", "signals_df", "positions", "fee", "logreturns_strat", "logreturns_asset", "logreturns_stop"]
+
+
+def _create(blocks, shape, dtype="float64"):
+    """Array in a new shared-memory block (appended to `blocks`), and the spec to attach to it elsewhere."""
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+    blocks.append(shm)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf), (shm.name, shape, dtype)
+
+
+def _release(blocks, unlink=False):
+    for shm in blocks:
+        if unlink:
+            shm.unlink()   # the memory itself goes once no process maps it
+        try:
+            shm.close()
+        except BufferError:
+            pass           # views still referenced by an exception traceback
+
+
+def _simulate_block(task):
+    """
+    Worker: simulate symbols [start, stop) reading bars and signals from
+    shared memory and writing the strat_data columns back into it.
+    Only the small end states travel back through the pool.
+    """
+    bounds, config, fields, specs = task
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    try:
+        arrays = [np.ndarray(shape, dtype=dtype, buffer=shm.buf) for shm, (_, shape, dtype) in zip(blocks, specs)]
+        return _simulate_views(bounds, config, fields, *arrays)
+    finally:
+        arrays = None
+        _release(blocks)
+
+
+def _simulate_views(bounds, config, fields, bars, signals, is_rebalance, out):
+    ends = []
+    for j in range(*bounds):
+        signal = signals[j]
+        columns, end = simulate_arrays(
+            config, signal[1:], {f: bars[k, j, 1:] for k, f in enumerate(fields)}, is_rebalance[1:],
+            last_signal=signal[0], last_position=0.0, last_close=bars[0, j, 0], cum_logret=0.0,
+        )
+        # first bar: flat, nothing to trade or earn yet
+        out[j, :, 0] = np.nan
+        out[j, COLUMNS.index("signals_df"), 0] = signal[0]
+        out[j, COLUMNS.index("positions"), 0] = 0.0
+        for k, col in enumerate(COLUMNS):
+            out[j, k, 1:] = columns[col]
+        ends.append(end)
+    return ends
+
+
+class ParallelBacktestEngine(BacktestEngine):
+    """
+    BacktestEngine running the per-symbol simulation in a process pool.
+
+    Signals are still generated on the whole panel in this process
+    (vectorized, and cross-sectional strategies need every symbol). The
+    aligned bars, signals and rebalance flags then go into shared memory
+    as (symbol x time) arrays; workers simulate contiguous blocks of
+    symbols on views of them and write the result columns into a shared
+    output array. Nothing per bar is pickled, only block bounds, the
+    config and each symbol's end state. Results, the end-of-run state
+    and extend() are identical to BacktestEngine's. Starting the pool
+    costs tens of ms, so runs under `min_cells` symbol x bar cells stay
+    serial (benchmarks/bench_parallel.py measures the scaling).
+
+    Parameters:
+        workers (int): process count, defaults to config.MAX_WORKERS;
+                       1 runs serially in this process
+        min_cells (int): symbols x grid bars below which the run is serial
+    """
+
+    def __init__(self, coin_data, strategy, config, journal=None, listing=None, workers=None, min_cells=250_000):
+        super().__init__(coin_data, strategy, config, journal=journal, listing=listing)
+        self.workers = workers or config.MAX_WORKERS
+        self.min_cells = min_cells
+
+    def _simulate_symbols(self, coin_data_for_sim, signals, is_rebalance):
+        symbols = list(self.coin_data)
+        workers = min(self.workers, len(symbols))
+        if workers <= 1 or len(symbols) * len(is_rebalance) < self.min_cells:
+            return super()._simulate_symbols(coin_data_for_sim, signals, is_rebalance)
+        blocks = []
+        try:
+            return self._simulate_shared(blocks, symbols, workers, coin_data_for_sim, signals, is_rebalance)
+        finally:
+            _release(blocks, unlink=True)
+
+    def _simulate_shared(self, blocks, symbols, workers, coin_data_for_sim, signals, is_rebalance):
+        index = signals[symbols[0]].index
+        fields = ["close"] + (["open", "high", "low"] if _stops_enabled(self.config) else [])
+        shape = (len(symbols), len(index))
+
+        bars, bars_spec = _create(blocks, (len(fields),) + shape)
+        sig, sig_spec = _create(blocks, shape)
+        for j, sym in enumerate(symbols):
+            sig[j] = signals[sym].to_numpy(dtype="float64")
+            for k, f in enumerate(fields):
+                bars[k, j] = coin_data_for_sim[sym][f].to_numpy(dtype="float64")
+        rebalance, rebalance_spec = _create(blocks, (len(index),), "bool")
+        rebalance[:] = is_rebalance
+        # one contiguous (column x time) block per symbol: the layout of its DataFrame
+        out, out_spec = _create(blocks, (len(symbols), len(COLUMNS), len(index)))
+
+        specs = (bars_spec, sig_spec, rebalance_spec, out_spec)
+        bounds = np.linspace(0, len(symbols), workers + 1).astype(int)
+        tasks = [((a, b), self.config, fields, specs) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            ends = [end for block in pool.map(_simulate_block, tasks) for end in block]
+
+        strat_data = {}
+        warmup = self._warmup_rows()
+        for j, sym in enumerate(symbols):
+            strat_data[sym] = pd.DataFrame(out[j].T, index=index, columns=COLUMNS, copy=True)
+            self._save_end_state(sym, coin_data_for_sim[sym], ends[j], warmup)
+        return strat_data
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class EWMACovariance:
+    """
+    Exponentially weighted covariance of log returns, updated bar by bar.
+
+    Each update is a rank-one step, S <- lam * S + (1 - lam) * r r', so the
+    estimate stays current at O(n^2) per bar instead of being recomputed from
+    a window at every rebalance. Zero-mean (RiskMetrics) form.
+    Missing returns (NaN, e.g. before a symbol lists) are skipped per pair:
+    the decayed weight each pair actually received is tracked alongside S
+    and divided out when reading the covariance.
+    """
+
+    def __init__(self, n_assets: int, halflife: float):
+        """
+        Parameters:
+            n_assets (int): number of assets, fixed order
+            halflife (float): halflife of the weights, in bars
+        """
+        self.lam = 0.5 ** (1.0 / halflife)
+        self.sum_xx = np.zeros((n_assets, n_assets))
+        self.weight = np.zeros((n_assets, n_assets))
+
+    def update(self, returns: np.ndarray):
+        valid = ~np.isnan(returns)
+        x = np.where(valid, returns, 0.0) * np.sqrt(1.0 - self.lam)
+        v = valid * np.sqrt(1.0 - self.lam)
+        self.sum_xx *= self.lam
+        self.sum_xx += np.outer(x, x)
+        self.weight *= self.lam
+        self.weight += np.outer(v, v)
+
+    def covariance(self, idx=None, min_weight: float = 0.0) -> np.ndarray:
+        """
+        Covariance for the assets at positions `idx` (all if None).
+        Entries whose pair weight is below `min_weight` are NaN.
+        """
+        idx = np.arange(len(self.weight)) if idx is None else np.asarray(idx)
+        s = self.sum_xx[np.ix_(idx, idx)]
+        w = self.weight[np.ix_(idx, idx)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(w > min_weight, s / w, np.nan)
+
+
+def clean_covariance(cov: np.ndarray) -> np.ndarray:
+    """
+    Make a partly estimated covariance usable for sizing: missing or zero
+    variances take the median valid variance, missing covariances are 0.
+    """
+    cov = cov.copy()
+    diag = np.diag(cov).copy()
+    ok = np.isfinite(diag) & (diag > 0)
+    fill = np.median(diag[ok]) if ok.any() else 1.0
+    diag[~ok] = fill
+    cov[~np.isfinite(cov)] = 0.0
+    np.fill_diagonal(cov, diag)
+    return cov
+
+
+def risk_parity_weights(cov: np.ndarray, n_iter: int = 200, tol: float = 1e-10) -> np.ndarray:
+    """
+    Equal-risk-contribution weights (long only, summing to 1) by cyclical
+    coordinate descent: each w_i solves cov_ii w_i^2 + c_i w_i - 1/n = 0,
+    with c_i the covariance of asset i with the rest of the portfolio.
+    """
+    n = len(cov)
+    if n == 0:
+        return np.zeros(0)
+    diag = np.diag(cov)
+    w = 1.0 / np.sqrt(diag)
+    w /= w.sum()
+    b = 1.0 / n
+    for _ in range(n_iter):
+        w_old = w.copy()
+        for i in range(n):
+            c = cov[i] @ w - diag[i] * w[i]
+            w[i] = (-c + np.sqrt(c * c + 4.0 * diag[i] * b)) / (2.0 * diag[i])
+        if np.abs(w - w_old).max() < tol * w.max():
+            break
+    return w / w.sum()
+
+
+def vol_target_scale(weights: np.ndarray, cov: np.ndarray, target_vol: float, periods_per_year: float) -> float:
+    """Gross exposure (capped at 1, no leverage) giving an annualized portfolio vol of `target_vol`."""
+    port_vol = np.sqrt(max(weights @ cov @ weights, 0.0) * periods_per_year)
+    if port_vol == 0:
+        return 1.0
+    return min(1.0, target_vol / port_vol)
@@ -0,0 +1,205 @@
+import itertools
+import math
+import time
+from dataclasses import fields, replace
+
+import numpy as np
+import pandas as pd
+
+from config import Config, cfg
+from analytics.rolling import nav_summary, periods_per_year
+from backtest.engine import BacktestEngine
+from strategies.breakout import BreakoutStrategy
+from strategies.indicators import IndicatorGraph
+from utils.helpers import granularity_to_pandas_freq, granularity_to_timedelta
+from utils.journal import Journal
+
+# candidate keys that are Config fields; every other key goes to the strategy
+CONFIG_FIELDS = {f.name for f in fields(Config)}
+
+
+def grid_candidates(grid: dict) -> list:
+    """Every combination of a {param: [values]} grid, as a list of dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def rung_schedule(dates: pd.DatetimeIndex, n_candidates: int, eta: int = 3, min_bars: int = 60) -> list:
+    """
+    Slice end dates of successive halving: the last rung is the whole history,
+    each earlier one 1/eta as long, with as many rungs as halvings of
+    `n_candidates` and no slice shorter than `min_bars`. Ends are rounded up
+    to day boundaries so intraday grids cut cleanly.
+    """
+    n_rungs = max(1, math.floor(math.log(max(n_candidates, 1), eta)) + 1)
+    ends = []
+    for k in range(n_rungs):
+        bars = max(min(min_bars, len(dates)), math.ceil(len(dates) * eta ** (k - n_rungs + 1)))
+        end = min(dates[bars - 1].ceil("D"), dates[-1]) if k < n_rungs - 1 else dates[-1]
+        if not ends or end > ends[-1]:
+            ends.append(end)
+    return ends
+
+
+def warmup_rows(strategy, config) -> int:
+    """Grid bars a strategy needs before its first signal (its warmup_bars on its timeframe)."""
+    warmup = getattr(strategy, "warmup_bars", None) or 0
+    timeframe = getattr(strategy, "timeframe", None)
+    if timeframe:
+        warmup *= max(1, granularity_to_timedelta(timeframe) // granularity_to_timedelta(config.GRANULARITY))
+    return warmup
+
+
+def _portfolio_nav(strat_data, config):
+    navs = pd.DataFrame({sym: df["nav"] for sym, df in strat_data.items()})
+    return navs.ffill().fillna(config.INITIAL_CAPITAL).sum(axis=1)
+
+
+def old_engine_nav(params, coin_data, config):
+    """
+    Evaluator for old_run_backtest_breakout (fixed 5/20 breakout, portfolio
+    with cash), for grids over REBALANCING and other Config fields.
+    It has no incremental mode, so every rung reruns it on the longer slice.
+    """
+    from old_breakout_strat import old_run_backtest_breakout
+
+    config = replace(config, JOURNAL_VERBOSITY="quiet", JOURNAL_PATH=None)
+    _, _, strategy_data = old_run_backtest_breakout(config, coin_data=coin_data)
+    return strategy_data["strat"]["nav"]
+
+
+def successive_halving(
+    coin_data,
+    grid,
+    config=cfg,
+    strategy_cls=BreakoutStrategy,
+    metric="sharpe",
+    eta=3,
+    min_bars=None,
+    score_bars=60,
+    evaluate=None,
+    verbose=True,
+):
+    """
+    Successive-halving search: score every candidate on a short slice of
+    history, keep the best 1/eta, and score the survivors again on a slice
+    eta times longer, up to the whole history.
+
+    With the default evaluator every candidate is a BacktestEngine; moving
+    to the next rung extends its run with the new bars instead of starting
+    over, so each bar is simulated once per candidate (the longest slice it
+    reached), and scores come from the engine's running metrics. The first
+    rung shares one aligned panel and indicator graph between all candidates.
+
+    Parameters:
+        coin_data (dict): {symbol: OHLCV DataFrame}
+        grid (dict | list): {param: [values]} or a list of candidate dicts;
+                            Config fields (FREQUENCY_DAYS, REBALANCING, FEE...)
+                            override the config, other keys go to strategy_cls
+        metric (str): nav_summary key to maximize ('sharpe', 'total_return',
+                      'ann_return', 'max_drawdown')
+        eta (int): 1/eta of the candidates survive each rung
+        min_bars (int): shortest slice, defaults to the longest candidate
+                        warmup plus `score_bars`, so no candidate is scored
+                        before its indicators are defined
+        score_bars (int): bars scored after that warmup on the first rung
+        evaluate (callable): (params, coin_data, config) -> portfolio NAV Series,
+                             run from scratch on each slice, e.g. old_engine_nav
+    Returns:
+        (pd.DataFrame, pd.DataFrame):
+            leaderboard, the last rung's candidates best first,
+            history, one row per candidate and rung with the slice end,
+            bars, metrics and status ('kept', 'pruned' or 'final')
+    """
+    candidates = grid_candidates(grid) if isinstance(grid, dict) else list(grid)
+    if not candidates:
+        raise ValueError("Empty parameter grid")
+    dates = pd.date_range(
+        pd.Timestamp(config.START_DATE).normalize(),
+        pd.Timestamp(config.END_DATE).normalize(),
+        freq=granularity_to_pandas_freq(config.GRANULARITY),
+    )
+    ppy = periods_per_year(config.GRANULARITY)
+    full_bars = len(candidates) * len(dates)
+
+    def candidate_config(params, end):
+        overrides = {k: v for k, v in params.items() if k in CONFIG_FIELDS}
+        return replace(config, **overrides, END_DATE=end.date(), JOURNAL_VERBOSITY="quiet")
+
+    def candidate_strategy(params, conf):
+        return strategy_cls(**{k: v for k, v in params.items() if k not in CONFIG_FIELDS}, config=conf)
+
+    if min_bars is None:
+        min_bars = score_bars + max(
+            warmup_rows(candidate_strategy(p, candidate_config(p, dates[-1])), config) for p in candidates
+        )
+    ends = rung_schedule(dates, len(candidates), eta, min_bars)
+
+    def slice_data(end):
+        return {sym: df[df.index <= end] for sym, df in coin_data.items()}
+
+    alive = list(range(len(candidates)))
+    engines = {}
+    history = []
+    simulated = 0
+    t0 = time.perf_counter()
+    for rung, end in enumerate(ends):
+        t_rung = time.perf_counter()
+        last = rung == len(ends) - 1
+        bars = int(dates.searchsorted(end, side="right"))
+        data = slice_data(end)
+        shared = {}  # first rung: aligned panel and indicator graph per grid
+        scores = {}
+        for i in alive:
+            params = candidates[i]
+            conf = candidate_config(params, end)
+            if evaluate is not None:
+                summary = nav_summary(evaluate(params, data, conf), ppy)
+                simulated += bars
+            elif i in engines:
+                engine = engines[i]
+                simulated += bars - int(dates.searchsorted(engine.state.last_time, side="right"))
+                engine.extend(data, end=end)
+                summary = engine.summary()["portfolio"]
+            else:
+                strategy = candidate_strategy(params, conf)
+                engine = BacktestEngine(data, strategy, conf, journal=Journal(verbosity="quiet"))
+                if not shared:
+                    shared["aligned"] = engine.align()
+                    shared["indicators"] = IndicatorGraph(shared["aligned"])
+                engine.run(coin_data_for_sim=shared["aligned"], indicators=shared["indicators"])
+                engines[i] = engine
+                summary = engine.summary()["portfolio"]
+                simulated += len(engine.all_dates)
+            score = summary.get(metric, np.nan)
+            scores[i] = -np.inf if pd.isna(score) else score
+            history.append({"candidate": i, **params, "rung": rung, "end": end, "bars": bars, **summary})
+
+        ranked = sorted(alive, key=lambda i: scores[i], reverse=True)
+        keep = ranked if last else ranked[: max(1, math.ceil(len(alive) / eta))]
+        status = "final" if last else "kept"
+        for row in history[-len(alive):]:
+            row["status"] = status if row["candidate"] in keep else "pruned"
+        for i in set(alive) - set(keep):
+            engines.pop(i, None)
+        if verbose:
+            best = candidates[ranked[0]]
+            print(
+                f"[INFO] Rung {rung} → {end.date()} ({bars} bars): {len(alive)} candidate(s), "
+                f"kept {len(keep)}, best {metric} {scores[ranked[0]]:.3f} {best} [{time.perf_counter() - t_rung:.2f}s]"
+            )
+        alive = keep
+
+    history = pd.DataFrame(history)
+    leaderboard = (
+        history[history["rung"] == len(ends) - 1]
+        .sort_values(metric, ascending=False, na_position="last")
+        .reset_index(drop=True)
+    )
+    if verbose:
+        print(
+            f"✅ Search done in {time.perf_counter() - t0:.2f}s | {len(candidates)} candidates, "
+            f"{simulated} candidate-bars simulated vs {full_bars} for the full grid "
+            f"({simulated / full_bars:.0%})"
+        )
+    return leaderboard, history
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+
+def _segments(starts, ends):
+    """Segment id and row of every row in the [start, end] ranges, concatenated."""
+    lengths = ends - starts + 1
+    seg = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    rows = starts[seg] + np.arange(lengths.sum()) - offsets[seg]
+    return seg, rows
+
+
+def apply_stops(positions, is_rebalance, open_, high, low, prev_close,
+                stop_loss=None, take_profit=None, trailing_stop=None, carry=None):
+    """
+    Intrabar stop-loss, take-profit and trailing-stop exits of one symbol's
+    long positions, evaluated against bar highs and lows.
+
+    A holding period is a run of held bars entered at the close before its
+    first bar. Its levels are entry * (1 - stop_loss), entry * (1 + take_profit)
+    and peak * (1 - trailing_stop), the peak being the highest high of the
+    earlier bars of the period. The first bar touching a level exits there,
+    or at the open if it gapped through; when both sides are touched in one
+    bar the stop is assumed first. After an exit the symbol stays flat until
+    the next rebalance still holding it, which starts a new period.
+
+    First touches are found for all holding periods at once (grouped cummax,
+    masks, first hit per group); only re-entries after a stop need another
+    pass, so the number of passes is the most stops in one run, not bars.
+
+    Parameters:
+        positions (array): positions set by the rebalance rule, per bar
+        is_rebalance (array): bool per bar
+        open_, high, low (array): bars, same length
+        prev_close (array): close of the previous bar (entry price of a period starting here)
+        stop_loss, take_profit, trailing_stop (float): fractions, None = off
+        carry (dict): state from the previous chunk (entry, peak, stopped), None = fresh
+    Returns:
+        (np.ndarray, np.ndarray, dict): positions held during each bar,
+        log return from the previous close to the exit price on exit bars
+        (NaN elsewhere), end state for the next chunk
+    """
+    positions = np.asarray(positions, dtype="float64")
+    n = len(positions)
+    carry = carry or {"entry": np.nan, "peak": np.nan, "stopped": False}
+    held = positions > 0
+    exposure = held.copy()
+    exit_price = np.full(n, np.nan)
+    end_state = {"entry": np.nan, "peak": np.nan, "stopped": False}
+    if n == 0:
+        return positions, exit_price, carry
+
+    # last bar of the held run each bar belongs to
+    run_last = np.flatnonzero(held & ~np.append(held[1:], False))
+    run_end = run_last[np.minimum(np.searchsorted(run_last, np.arange(n)), len(run_last) - 1)] if len(run_last) else None
+    rebalances = np.append(np.flatnonzero(is_rebalance), n)   # n: none left in this chunk
+
+    def next_rebalance(k):
+        return rebalances[np.searchsorted(rebalances, k, side="right")]
+
+    def reenter(k):
+        """Flat from k+1 to the next rebalance, new periods from there (k = -1: stopped before this chunk)."""
+        k = np.asarray(k)
+        last = run_end[np.maximum(k, 0)]
+        back = np.minimum(next_rebalance(k), last + 1)
+        flat = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(flat, k + 1, 1)
+        np.add.at(flat, back, -1)
+        exposure[np.cumsum(flat[:-1]) > 0] = False
+        return back[back <= last]
+
+    starts = np.flatnonzero(held & ~np.insert(held[:-1], 0, False))
+    entry = prev_close[starts]
+    peak = entry.copy()
+    if held[0] and carry["stopped"]:
+        starts, entry, peak = starts[1:], entry[1:], peak[1:]
+        back = reenter(np.array([-1]))
+        starts, entry, peak = np.append(back, starts), np.append(prev_close[back], entry), np.append(prev_close[back], peak)
+    elif held[0] and not np.isnan(carry["entry"]):
+        entry[0], peak[0] = carry["entry"], carry["peak"]
+
+    while len(starts):
+        seg, rows = _segments(starts, run_end[starts])
+        seg_first = np.insert(seg[1:] != seg[:-1], 0, True)
+        highest = pd.Series(high[rows]).groupby(seg).cummax().to_numpy()
+        before = np.where(seg_first, -np.inf, np.roll(highest, 1))
+        e = entry[seg]
+
+        lower = np.full(len(rows), -np.inf)
+        if stop_loss is not None:
+            lower = np.maximum(lower, e * (1 - stop_loss))
+        if trailing_stop is not None:
+            lower = np.maximum(lower, np.fmax(peak[seg], before) * (1 - trailing_stop))
+        upper = e * (1 + take_profit) if take_profit is not None else np.full(len(rows), np.inf)
+        hit_low = low[rows] <= lower
+        hit = hit_low | (high[rows] >= upper)
+
+        hits = np.flatnonzero(hit)
+        hit_seg, first = np.unique(seg[hits], return_index=True)
+        first = hits[first]
+        k = rows[first]
+        exit_price[k] = np.where(
+            hit_low[first], np.fmin(lower[first], open_[k]), np.fmax(upper[first], open_[k])
+        )
+
+        # period still open on the last bar: carried to the next chunk
+        if rows[-1] == n - 1 and seg[-1] not in hit_seg:
+            end_state["entry"] = entry[seg[-1]]
+            end_state["peak"] = np.fmax(peak[seg[-1]], highest[-1])
+
+        starts = reenter(k)
+        entry = prev_close[starts]
+        peak = entry.copy()
+
+    held_pos = np.where(exposure, positions, 0.0)
+    end_state["stopped"] = bool(held[-1] and (not exposure[-1] or not np.isnan(exit_price[-1])))
+    return held_pos, np.log(exit_price / prev_close), end_state
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+OHLCV_AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: pd.Timedelta, origin: pd.Timestamp) -> pd.DataFrame:
+    """
+    Coarse OHLCV bars from fine grid rows, labelled by open time, bins
+    anchored at `origin`. A leading bin that starts before the first row
+    (partial) is dropped, so the same bars come out of any slice of the grid
+    that starts on a bin boundary or later.
+    """
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in df.columns}
+    bars = df.resample(timeframe, origin=origin, label="left", closed="left").agg(agg)
+    if len(df):
+        bars = bars[bars.index >= df.index[0]]
+    return bars
+
+
+def bar_index_map(fine_index, fine: pd.Timedelta, coarse_index, coarse: pd.Timedelta) -> np.ndarray:
+    """
+    For each fine bar, position of the last coarse bar already closed when
+    the fine bar closes (-1 if none): coarse open + coarse <= fine open + fine.
+    Works in both directions, so it also maps fine signals onto a coarser grid.
+    No look-ahead: a coarse bar only shows up on its own last fine bar.
+    """
+    cutoff = pd.DatetimeIndex(fine_index) + (fine - coarse)
+    return np.searchsorted(pd.DatetimeIndex(coarse_index).asi8, cutoff.asi8, side="right") - 1
+
+
+def broadcast(values: np.ndarray, index_map: np.ndarray) -> np.ndarray:
+    """values[index_map] with NaN where the map is -1 (nothing visible yet)."""
+    values = np.asarray(values, dtype="float64")
+    if len(values) == 0:
+        return np.full(len(index_map), np.nan)
+    out = values[np.maximum(index_map, 0)]
+    out[index_map < 0] = np.nan
+    return out
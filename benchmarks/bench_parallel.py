@@ -0,0 +1,87 @@
+"""
+Process-pool simulation against the serial engine, by worker count.
+
+    python -m benchmarks.bench_parallel [n_symbols] [granularity] [max_workers]
+
+Runs BacktestEngine and ParallelBacktestEngine (parallel path forced, no
+size threshold) with 1, 2, 4... workers up to max_workers (default: the
+CPU count) on a synthetic universe, checks the results are identical and
+prints wall times and speedups, for the whole run and for the simulation
+step alone. Scaling needs as many free cores as workers.
+"""
+import os
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from backtest.compare import synthetic_coin_data
+from backtest.engine import BacktestEngine
+from backtest.parallel import ParallelBacktestEngine
+from strategies.breakout import BreakoutStrategy
+from utils.journal import Journal
+
+
+def timed_run(make_engine, repeat=2):
+    """Fastest of `repeat` runs: (run seconds, simulation seconds, strat_data)."""
+    best = (float("inf"), float("inf"), None)
+    for _ in range(repeat):
+        engine = make_engine()
+        simulate = engine._simulate_symbols
+        spent = []
+
+        def timed_simulate(*args):
+            t0 = time.perf_counter()
+            out = simulate(*args)
+            spent.append(time.perf_counter() - t0)
+            return out
+
+        engine._simulate_symbols = timed_simulate
+        t0 = time.perf_counter()
+        strat_data = engine.run()
+        best = min(best, (time.perf_counter() - t0, spent[0], strat_data), key=lambda r: r[0])
+    return best
+
+
+def identical(a, b) -> bool:
+    return list(a) == list(b) and all(
+        a[sym].index.equals(b[sym].index) and np.array_equal(a[sym].to_numpy(), b[sym].to_numpy(), equal_nan=True)
+        for sym in a
+    )
+
+
+def main():
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    granularity = sys.argv[2] if len(sys.argv) > 2 else "1h"
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    config = replace(
+        cfg, GRANULARITY=granularity, START_DATE=pd.Timestamp("2024-01-01").date(),
+        END_DATE=pd.Timestamp("2026-01-10").date(), JOURNAL_VERBOSITY="quiet",
+    )
+    coin_data = synthetic_coin_data(n_symbols, config, seed=0)
+    strategy = lambda: BreakoutStrategy(short_window=5, long_window=20, config=config)
+    quiet = lambda: Journal(verbosity="quiet")
+
+    serial_run, serial_sim, reference = timed_run(lambda: BacktestEngine(coin_data, strategy(), config, journal=quiet()))
+    bars = len(next(iter(reference.values())))
+    print(f"{n_symbols} symbols x {bars} {granularity} bars, {os.cpu_count()} CPU(s)")
+    print(f"{'serial':>10}: run {serial_run:.3f}s, simulate {serial_sim:.3f}s")
+
+    workers = 1
+    while workers <= max_workers:
+        run, sim, strat_data = timed_run(lambda: ParallelBacktestEngine(
+            coin_data, strategy(), config, journal=quiet(), workers=workers, min_cells=0
+        ))
+        status = "✅ identical" if identical(reference, strat_data) else "❌ differs"
+        print(
+            f"{workers:>3} worker(s): run {run:.3f}s (x{serial_run / run:.2f}), "
+            f"simulate {sim:.3f}s (x{serial_sim / sim:.2f}) | {status}"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 
 # ================= CONFIG =================
 from dataclasses import dataclass
-from typing import Set, Dict
+from typing import Set, Dict, Optional
 from datetime import date, timedelta
 
 
@@ -13,7 +13,13 @@ class Config:
     GRANULARITY: str
     FEE: float
     DAYS: int
+    MIN_HISTORY_BARS: int
     REBALANCING: str
+    RISK_PARITY_HALFLIFE: float
+    TARGET_VOL: float
+    STOP_LOSS: Optional[float]
+    TAKE_PROFIT: Optional[float]
+    TRAILING_STOP: Optional[float]
 
     START_DATE: date
     END_DATE: date
@@ -26,8 +32,19 @@ class Config:
     HEADERS: Dict[str, str]
 
     COIN_DATA_CACHE_FILE: str
+    COIN_DATA_STORE: str
     FORCE_REFRESH: bool
 
+    LIVE_CONCURRENCY: int
+    LIVE_WEIGHT_LIMIT: int
+
+    JOURNAL_PATH: Optional[str]
+    JOURNAL_VERBOSITY: str
+
+    SERVICE_HOST: str
+    SERVICE_PORT: int
+    SERVICE_CACHE_MB: int
+
 
 cfg = Config(
     COIN_SELECTION={"BTCUSDT", "ETHUSDT", "SOLUSDT","BONKUSDT","PUMPUSDT"},
@@ -36,7 +53,16 @@ cfg = Config(
     GRANULARITY="1d",
     FEE=0.001,
     DAYS=40,
+    # bars of history before a symbol is tradable (point-in-time listing index)
+    MIN_HISTORY_BARS=20,
     REBALANCING="prorata_active",
+    # risk_parity only: EWMA covariance halflife (bars) and annualized vol target
+    RISK_PARITY_HALFLIFE=20,
+    TARGET_VOL=0.6,
+    # BacktestEngine intrabar exits on high/low, fractions of the entry (peak for trailing); None = off
+    STOP_LOSS=None,
+    TAKE_PROFIT=None,
+    TRAILING_STOP=None,
 
     # START_DATE=date.today() - timedelta(days=40),
     START_DATE=date(2025, 7, 21),
@@ -59,7 +85,22 @@ cfg = Config(
     },
 
     COIN_DATA_CACHE_FILE="api_data_cache.json",
+    COIN_DATA_STORE="coin_data_store",
     FORCE_REFRESH=False,
+
+    LIVE_CONCURRENCY=64,
+    # request weight per minute the live runner stays under (Binance spot allows 6000)
+    LIVE_WEIGHT_LIMIT=6000,
+
+    # backtest event journal: .jsonl or .arrow file (None = in memory only),
+    # console verbosity 'quiet' | 'summary' | 'trades' | 'bars'
+    JOURNAL_PATH=None,
+    JOURNAL_VERBOSITY="summary",
+
+    # warm backtest service (python -m service.server)
+    SERVICE_HOST="127.0.0.1",
+    SERVICE_PORT=8766,
+    SERVICE_CACHE_MB=512,
 )
 
 
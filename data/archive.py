@@ -0,0 +1,192 @@
+import io
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+from config import cfg
+from data.fetch import KLINE_COLUMNS, fetch_klines
+from data.store import write_partitioned
+from utils.helpers import granularity_to_timedelta
+
+# data.binance.vision layout: <SYMBOL>-<interval>-<YYYY-MM>.zip (monthly) or -<YYYY-MM-DD>.zip (daily),
+# each holding one CSV of /klines rows
+ARCHIVE_NAME = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\d+[mhdw])-(?P<period>\d{4}-\d{2}(?:-\d{2})?)\.zip$")
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+COLUMN_TYPES = {"open_time": pa.int64(), **{col: pa.float64() for col in OHLCV}}
+
+
+def list_archives(archive_dir, symbols=None, interval=None) -> dict:
+    """
+    Kline archives in `archive_dir` (searched recursively), as {(symbol, interval): [paths]}
+    ordered by period, monthly files before the daily files of the same month.
+    """
+    found = {}
+    for path in sorted(Path(archive_dir).rglob("*.zip")):
+        m = ARCHIVE_NAME.match(path.name)
+        if m is None:
+            continue
+        if (symbols is not None and m["symbol"] not in symbols) or (interval is not None and m["interval"] != interval):
+            continue
+        found.setdefault((m["symbol"], m["interval"]), []).append((m["period"], path))
+    return {key: [path for _, path in sorted(files)] for key, files in found.items()}
+
+
+def read_archive(path) -> dict:
+    """
+    One archive parsed straight into typed arrays with pyarrow's CSV reader
+    (no Python objects per row): {'open_time': int64 ms, OHLCV: float64}.
+    Single-threaded: import_archives runs one reader per file in parallel.
+    Accepts CSVs with or without a header row, and microsecond open times
+    (newer spot archives), which are brought back to milliseconds.
+    """
+    with zipfile.ZipFile(path) as zf:
+        member = next(name for name in zf.namelist() if name.endswith(".csv"))
+        raw = zf.read(member)
+    header = not raw[:1].isdigit()
+    table = pv.read_csv(
+        io.BytesIO(raw),
+        read_options=pv.ReadOptions(column_names=KLINE_COLUMNS, skip_rows=int(header), use_threads=False),
+        convert_options=pv.ConvertOptions(column_types=COLUMN_TYPES, include_columns=list(COLUMN_TYPES)),
+    )
+    arrays = {col: table.column(col).to_numpy() for col in COLUMN_TYPES}
+    if len(arrays["open_time"]) and arrays["open_time"][0] > 10**14:
+        arrays["open_time"] = arrays["open_time"] // 1000
+    return arrays
+
+
+def _assemble(chunks: list) -> pd.DataFrame:
+    """Archive arrays of one symbol -> OHLCV frame in the cache layout, duplicates and bad bars dropped."""
+    arrays = {col: np.concatenate([c[col] for c in chunks]) for col in COLUMN_TYPES}
+    # later files win on overlap (daily after monthly), then rows in time order
+    order = np.argsort(arrays["open_time"][::-1], kind="stable")
+    open_time = arrays["open_time"][::-1][order]
+    first = np.append(True, open_time[1:] != open_time[:-1])
+    rows = len(arrays["open_time"]) - 1 - order[first]
+
+    o, h, l, c, v = (arrays[col][rows] for col in OHLCV)
+    valid = np.isfinite(o + h + l + c + v) & (h >= np.maximum(o, c)) & (l <= np.minimum(o, c)) & (v >= 0)
+    df = pd.DataFrame(
+        {"open": o, "high": h, "low": l, "close": c, "volume": v},
+        index=pd.DatetimeIndex(pd.to_datetime(open_time[first], unit="ms"), name="date"),
+    )
+    if not valid.all():
+        print(f"[WARN] Dropped {int((~valid).sum())} malformed bar(s)")
+    return df[valid]
+
+
+def continuity(index: pd.DatetimeIndex, interval: str) -> dict:
+    """Bars, gaps and missing bars of a sorted open-time index on the interval grid."""
+    bar = granularity_to_timedelta(interval).value
+    steps = np.diff(index.asi8)
+    gaps = np.flatnonzero(steps != bar)
+    return {
+        "bars": len(index),
+        "gaps": len(gaps),
+        "missing": int((steps[gaps] // bar - 1).clip(0).sum()),
+        "misaligned": int(np.count_nonzero(steps[gaps] % bar)),
+        "first_gap": index[gaps[0]] if len(gaps) else None,
+    }
+
+
+def _fetch_tail(symbol, after, interval, end, base_url=None, session=None) -> pd.DataFrame:
+    """Bars opened after `after` from the REST /klines endpoint, in the cache layout."""
+    bar = granularity_to_timedelta(interval)
+    df = fetch_klines(symbol, after + bar, end, interval=interval, base_url=base_url, session=session)
+    if df.empty:
+        return df
+    # fetch_klines indexes by close time (open + bar - 1 ms, UTC)
+    df.index = pd.DatetimeIndex(df.index.tz_convert(None) + pd.Timedelta(1, "ms") - bar, name="date")
+    return df[df.index > after]
+
+
+def import_archives(
+    archive_dir,
+    symbols=None,
+    interval=None,
+    root=None,
+    tail=True,
+    end=None,
+    max_workers=None,
+    base_url=None,
+):
+    """
+    Bulk-load exchange kline archives into the partitioned store, with REST
+    /klines only for the bars after the last archived one.
+
+    Archives are unzipped and parsed in parallel threads (zlib and the
+    pyarrow CSV reader release the GIL), concatenated per symbol with
+    overlaps and malformed bars dropped, checked for gaps on the interval
+    grid, and written with write_partitioned (months merge with what is
+    already stored, new rows win).
+
+    Parameters:
+        archive_dir (str | Path): directory of <SYMBOL>-<interval>-<period>.zip files
+        symbols (iterable): restrict to these symbols, all found by default
+        interval (str): restrict to one interval, e.g. '1m'
+        root (str | Path): store root, defaults to cfg.COIN_DATA_STORE
+        tail (bool): fetch the bars after the archives from REST, up to `end`
+        end: last bar to fetch, defaults to now (UTC)
+        max_workers (int): reader threads, defaults to cfg.MAX_WORKERS
+        base_url (str): REST base, defaults to cfg.BINANCE_BASE (e.g. a StubExchange)
+    Returns:
+        dict: {(symbol, interval): OHLCV DataFrame indexed by open time, as stored}
+    """
+    t0 = time.perf_counter()
+    files = list_archives(archive_dir, symbols, interval)
+    if not files:
+        print(f"[WARN] No kline archives found in {archive_dir}/")
+        return {}
+    jobs = [(key, path) for key, paths in files.items() for path in paths]
+
+    with ThreadPoolExecutor(max_workers=max_workers or cfg.MAX_WORKERS) as pool:
+        parsed = list(pool.map(lambda job: read_archive(job[1]), jobs))
+    t_parse = time.perf_counter() - t0
+
+    chunks = {}
+    for (key, _), arrays in zip(jobs, parsed):
+        chunks.setdefault(key, []).append(arrays)
+    coin_data = {key: _assemble(c) for key, c in chunks.items()}
+
+    if tail:
+        end = pd.Timestamp.now("UTC").tz_localize(None) if end is None else pd.Timestamp(end)
+        pending = [key for key, df in coin_data.items() if not df.empty]
+        with ThreadPoolExecutor(max_workers=max_workers or cfg.MAX_WORKERS) as pool:
+            tails = list(pool.map(
+                lambda key: _fetch_tail(key[0], coin_data[key].index[-1], key[1], end, base_url), pending
+            ))
+        for key, rows in zip(pending, tails):
+            if not rows.empty:
+                coin_data[key] = pd.concat([coin_data[key], rows[OHLCV]])
+
+    for (symbol, ivl), df in coin_data.items():
+        report = continuity(df.index, ivl)
+        if report["gaps"]:
+            print(
+                f"[WARN] {symbol} {ivl}: {report['gaps']} gap(s), {report['missing']} missing bar(s), "
+                f"{report['misaligned']} off-grid, first after {report['first_gap']}"
+            )
+
+    for ivl in sorted({ivl for _, ivl in coin_data}):
+        write_partitioned({sym: df for (sym, i), df in coin_data.items() if i == ivl}, root, granularity=ivl)
+
+    bars = sum(len(df) for df in coin_data.values())
+    print(
+        f"✅ Imported {len(jobs)} archive(s), {len(coin_data)} series, {bars} bars "
+        f"(parsed in {t_parse:.2f}s, total {time.perf_counter() - t0:.2f}s)"
+    )
+    return coin_data
+
+
+if __name__ == "__main__":
+    # python -m data.archive <archive_dir> [interval]
+    import sys
+
+    import_archives(sys.argv[1], interval=sys.argv[2] if len(sys.argv) > 2 else None)
@@ -1,5 +1,6 @@
 from config import cfg
 from utils.helpers import is_stable_base, get_price_at_or_before
+from data.store import load_partitioned
 
 import time
 import requests
@@ -8,6 +9,28 @@ from typing import Optional
 import os
 from pathlib import Path
 
+# Binance /klines row layout
+KLINE_COLUMNS = [
+    "open_time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time",
+    "quote_volume",
+    "num_trades",
+    "taker_base",
+    "taker_quote",
+    "ignore",
+]
+
+def _retry_delay(response, sleep: float) -> float:
+    """Seconds to wait before retrying: Retry-After on 418/429, else `sleep`."""
+    if response is not None and response.status_code in (418, 429):
+        return float(response.headers.get("Retry-After", sleep))
+    return sleep
+
 def fetch_klines(
     symbol: str,
     start_date,
@@ -15,15 +38,21 @@ def fetch_klines(
     interval: str = "1d",
     max_retries: int = 3,
     sleep: float = 0.5,
+    base_url: Optional[str] = None,
+    session: Optional[requests.Session] = None,
 ) -> pd.DataFrame:
     """
     Fetch OHLCV data from Binance with robustness suitable for backtesting.
+    Pages through /klines 1000 bars at a time; 418/429 are retried after the
+    server's Retry-After. `base_url` defaults to cfg.BINANCE_BASE and can point
+    to a local StubExchange.
     """
 
     start_ts = int(pd.Timestamp(start_date).timestamp() * 1000)
     end_ts = int(pd.Timestamp(end_date).timestamp() * 1000)
 
-    url = "https://api.binance.com/api/v3/klines"
+    url = f"{base_url or cfg.BINANCE_BASE}/klines"
+    http = session or requests
     params = {
         "symbol": symbol,
         "interval": interval,
@@ -32,56 +61,50 @@ def fetch_klines(
         "limit": 1000,
     }
 
-    for attempt in range(max_retries):
-        try:
-            r = requests.get(url, params=params, timeout=10)
-            r.raise_for_status()
-            data = r.json()
-
-            if not data:
-                return pd.DataFrame()
-
-            df = pd.DataFrame(
-                data,
-                columns=[
-                    "open_time",
-                    "open",
-                    "high",
-                    "low",
-                    "close",
-                    "volume",
-                    "close_time",
-                    "quote_volume",
-                    "num_trades",
-                    "taker_base",
-                    "taker_quote",
-                    "ignore",
-                ],
-            )
+    rows = []
+    while True:
+        data = None
+        for attempt in range(max_retries):
+            try:
+                r = http.get(url, params=params, timeout=10)
+                r.raise_for_status()
+                data = r.json()
+                break
+
+            except requests.exceptions.RequestException as e:
+                if attempt == max_retries - 1:
+                    print(f"[ERROR] fetch_klines failed for {symbol}: {e}")
+                    return pd.DataFrame()
+                time.sleep(_retry_delay(getattr(e, "response", None), sleep))
+
+        if not data:
+            break
+        rows.extend(data)
+        if len(data) < params["limit"]:
+            break
+        # next page starts after the last open time
+        params["startTime"] = data[-1][0] + 1
 
-            idx = pd.to_datetime(df["close_time"], unit="ms", utc=True)
-            df.index = idx  # keep full timestamp
-            df = df.drop(columns="close_time", errors="ignore")
+    if not rows:
+        return pd.DataFrame()
 
-            cols = ["open", "high", "low", "close", "volume"]
-            df[cols] = df[cols].astype("float64")
+    df = pd.DataFrame(rows, columns=KLINE_COLUMNS)
 
-            df = df[cols]
+    idx = pd.to_datetime(df["close_time"], unit="ms", utc=True)
+    df.index = idx  # keep full timestamp
+    df = df.drop(columns="close_time", errors="ignore")
 
-            # Defensive checks
-            df = df.sort_index()
-            df = df[~df.index.duplicated(keep="first")]
-            df = df[df["volume"] >= 0]
+    cols = ["open", "high", "low", "close", "volume"]
+    df[cols] = df[cols].astype("float64")
 
-            return df
+    df = df[cols]
 
-        except requests.exceptions.RequestException as e:
-            if attempt == max_retries - 1:
-                print(f"[ERROR] fetch_klines failed for {symbol}: {e}")
-                return pd.DataFrame()
-            time.sleep(sleep)
+    # Defensive checks
+    df = df.sort_index()
+    df = df[~df.index.duplicated(keep="first")]
+    df = df[df["volume"] >= 0]
 
-    return pd.DataFrame()
+    return df
 
 
 
@@ -171,9 +194,20 @@ def get_coin_data(config):
     cache_dir = "coin_data_cache"
 
     # ---------- LOAD FROM CACHE ----------
-    if not config.FORCE_REFRESH and os.path.exists(cache_dir):
+    coin_data = None
+    if not config.FORCE_REFRESH and os.path.exists(config.COIN_DATA_STORE):
+        # partitioned store: only selected symbols and START_DATE..END_DATE are read
+        coin_data = load_partitioned(
+            config.COIN_DATA_STORE,
+            symbols=config.COIN_SELECTION,
+            start=config.START_DATE,
+            end=pd.Timestamp(config.END_DATE) + pd.Timedelta(days=1) - pd.Timedelta(1, "ns"),
+            granularity=config.GRANULARITY,
+        )
+    elif not config.FORCE_REFRESH and os.path.exists(cache_dir):
         coin_data = load_coin_data_dict(cache_dir)
 
+    if coin_data is not None:
         print(f"✅ Loaded {list(coin_data.keys())} from cache")
         print("📊 Coin Date Ranges:")
         print("-" * 50)
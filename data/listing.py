@@ -0,0 +1,177 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from data.store import MANIFEST, read_manifest
+from utils.helpers import granularity_to_timedelta
+
+
+def _ns(t) -> np.datetime64:
+    """Naive datetime64[ns] of any timestamp-like (tz-aware ones in UTC)."""
+    t = pd.Timestamp(t)
+    return np.datetime64(t.tz_convert(None) if t.tz is not None else t, "ns")
+
+
+class ListingIndex:
+    """
+    Point-in-time listing index: per symbol, first bar, last bar and the
+    time its `min_history`-th bar closed the history requirement ("ready").
+
+    Answers "which symbols were tradable with N bars of history at t"
+    by binary search over ready times, without touching the price frames,
+    so universes can be built free of survivorship and look-ahead.
+    A symbol is tradable at t when ready <= t <= last bar.
+    """
+
+    def __init__(self, symbols, first_bar, last_bar, ready, n_bars, min_history: int):
+        as_ns = lambda values: pd.DatetimeIndex(list(values), dtype="datetime64[ns]").to_numpy()
+        order = np.argsort(as_ns(ready), kind="stable")
+        self.symbols = np.asarray(list(symbols), dtype=object)[order]
+        self.first_bar = as_ns(first_bar)[order]
+        self.last_bar = as_ns(last_bar)[order]
+        self.ready = as_ns(ready)[order]  # NaT: not enough history yet
+        self.n_bars = np.asarray(list(n_bars), dtype=np.int64)[order]
+        self.min_history = min_history
+        self._pos = {sym: i for i, sym in enumerate(self.symbols)}
+
+    # ---------- BUILD ----------
+    @classmethod
+    def from_coin_data(cls, coin_data: dict, min_history: int = None, history_start=None):
+        """
+        From {symbol: OHLCV DataFrame} with sorted indexes; reads index endpoints only.
+        Parameters:
+            history_start: earliest time the frames can hold (e.g. START_DATE when
+                           loaded with get_coin_data); a symbol with a bar there
+                           was listed before, its history is cut, so it counts
+                           as ready from its first bar. None: frames are whole.
+        """
+        min_history = cfg.MIN_HISTORY_BARS if min_history is None else min_history
+        cut = None if history_start is None else _ns(history_start)
+        symbols, first, last, ready, n_bars = [], [], [], [], []
+        for sym, df in coin_data.items():
+            if df.empty:
+                continue
+            index = df.index.tz_convert(None) if df.index.tz is not None else df.index
+            symbols.append(sym)
+            first.append(index[0])
+            last.append(index[-1])
+            if cut is not None and _ns(index[0]) <= cut:
+                ready.append(index[0])
+            else:
+                ready.append(index[max(min_history, 1) - 1] if len(index) >= min_history else pd.NaT)
+            n_bars.append(len(index))
+        return cls(symbols, first, last, ready, n_bars, min_history)
+
+    @classmethod
+    def for_config(cls, config, coin_data: dict):
+        """
+        Index for a run of `config` on `coin_data` as loaded by get_coin_data:
+        from the store manifest when a store exists (real first bars, not the
+        loaded window), symbols missing from it added from their frames; else
+        from the frames, cut at START_DATE.
+        """
+        if (Path(config.COIN_DATA_STORE) / MANIFEST).exists():
+            index = cls.from_manifest(config.COIN_DATA_STORE, config.MIN_HISTORY_BARS, config.GRANULARITY)
+            missing = {sym: df for sym, df in coin_data.items() if sym not in index._pos}
+            return index.update(missing) if missing else index
+        return cls.from_coin_data(coin_data, config.MIN_HISTORY_BARS, history_start=config.START_DATE)
+
+    @classmethod
+    def from_manifest(cls, root=None, min_history: int = None, granularity: str = None):
+        """
+        From the partitioned store's manifest, without reading any parquet.
+        Ready times assume no gaps inside the month reaching `min_history` rows.
+        """
+        min_history = cfg.MIN_HISTORY_BARS if min_history is None else min_history
+        granularity = granularity or cfg.GRANULARITY
+        bar = granularity_to_timedelta(granularity)
+        parts = pd.DataFrame(read_manifest(root or cfg.COIN_DATA_STORE).values())
+        symbols, first, last, ready, n_bars = [], [], [], [], []
+        if parts.empty:
+            return cls(symbols, first, last, ready, n_bars, min_history)
+
+        parts = parts[parts["granularity"] == granularity].sort_values(["symbol", "month"])
+        for sym, p in parts.groupby("symbol", sort=True):
+            starts = pd.to_datetime(p["start"].to_numpy())
+            rows = p["rows"].to_numpy()
+            cum = np.cumsum(rows)
+            k = np.searchsorted(cum, max(min_history, 1))   # month holding the N-th bar
+            symbols.append(sym)
+            first.append(starts[0])
+            last.append(pd.Timestamp(p["end"].iloc[-1]))
+            n_bars.append(int(cum[-1]))
+            if k < len(rows):
+                before = cum[k] - rows[k]
+                ready.append(starts[k] + (max(min_history, 1) - before - 1) * bar)
+            else:
+                ready.append(pd.NaT)
+        return cls(symbols, first, last, ready, n_bars, min_history)
+
+    def update(self, new_bars: dict):
+        """
+        Index extended with newer bars ({symbol: DataFrame}), e.g. from
+        BacktestEngine.extend; rows up to a symbol's known last bar are ignored.
+        """
+        rows = {
+            sym: [self.first_bar[i], self.last_bar[i], self.ready[i], self.n_bars[i]]
+            for i, sym in enumerate(self.symbols)
+        }
+        need = max(self.min_history, 1)
+        for sym, df in new_bars.items():
+            index = df.index.tz_convert(None) if df.index.tz is not None else df.index
+            if sym in rows:
+                index = index[index > rows[sym][1]]
+            if index.empty:
+                continue
+            first, last, ready, n = rows.get(sym, [index[0], None, pd.NaT, 0])
+            if pd.isna(ready) and n + len(index) >= need:
+                ready = index[need - n - 1]
+            rows[sym] = [first, index[-1], ready, n + len(index)]
+        syms = list(rows)
+        return ListingIndex(syms, *zip(*(rows[s] for s in syms)), self.min_history) if syms else self
+
+    # ---------- QUERIES ----------
+    def tradable(self, t) -> list:
+        """Symbols with `min_history` bars and still listed at time t."""
+        t = _ns(t)
+        n = np.searchsorted(self.ready, t, side="right")   # NaT sorts last, never ready
+        return list(self.symbols[:n][self.last_bar[:n] >= t])
+
+    def is_tradable(self, symbol, t) -> bool:
+        i = self._pos.get(symbol)
+        if i is None or np.isnat(self.ready[i]):
+            return False
+        t = _ns(t)
+        return bool(self.ready[i] <= t <= self.last_bar[i])
+
+    def mask(self, dates, symbols=None) -> pd.DataFrame:
+        """Boolean dates x symbols tradability matrix; unknown symbols are never tradable."""
+        dates = pd.DatetimeIndex(dates)
+        symbols = list(self.symbols) if symbols is None else list(symbols)
+        if len(self.symbols) == 0:
+            return pd.DataFrame(False, index=dates, columns=symbols)
+        idx = np.array([self._pos.get(s, -1) for s in symbols], dtype=int)
+        ready = np.where(idx >= 0, self.ready[idx], np.datetime64("NaT"))
+        last = np.where(idx >= 0, self.last_bar[idx], np.datetime64("NaT"))
+        t = (dates.tz_convert(None) if dates.tz is not None else dates).to_numpy()
+        ok = (ready[None, :] <= t[:, None]) & (t[:, None] <= last[None, :])
+        return pd.DataFrame(ok, index=dates, columns=symbols)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"first_bar": self.first_bar, "last_bar": self.last_bar, "ready": self.ready, "n_bars": self.n_bars},
+            index=pd.Index(self.symbols, name="symbol"),
+        )
+
+    def save(self, path):
+        frame = self.to_frame()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        frame.assign(min_history=self.min_history).to_parquet(path)
+
+    @classmethod
+    def load(cls, path):
+        frame = pd.read_parquet(path)
+        min_history = int(frame["min_history"].iloc[0]) if len(frame) else cfg.MIN_HISTORY_BARS
+        return cls(frame.index, frame["first_bar"], frame["last_bar"], frame["ready"], frame["n_bars"], min_history)
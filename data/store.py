@@ -0,0 +1,166 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import cfg
+
+MANIFEST = "_manifest.json"
+
+
+def _partition_dir(root, symbol, granularity, month) -> Path:
+    return Path(root) / f"symbol={symbol}" / f"granularity={granularity}" / f"month={month}"
+
+
+def read_manifest(root) -> dict:
+    """{relative file path: {'symbol', 'granularity', 'month', 'rows', 'start', 'end'}}"""
+    path = Path(root) / MANIFEST
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)["files"]
+
+
+def _write_manifest(root, files: dict):
+    tmp = Path(root) / f"{MANIFEST}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"updated": pd.Timestamp.utcnow().isoformat(), "files": files}, f, indent=1, sort_keys=True)
+    tmp.replace(Path(root) / MANIFEST)
+
+
+def write_partitioned(coin_data, root=None, granularity=None, row_group_size=24 * 7):
+    """
+    Write {symbol: OHLCV DataFrame} into the partitioned store
+    root/symbol=<SYM>/granularity=<G>/month=<YYYY-MM>/part-0.parquet.
+    Existing months are merged (new rows win), row groups carry min/max
+    statistics for predicate pushdown, and the manifest is updated.
+    """
+    root = Path(root or cfg.COIN_DATA_STORE)
+    granularity = granularity or cfg.GRANULARITY
+    root.mkdir(parents=True, exist_ok=True)
+    files = read_manifest(root)
+
+    for symbol, df in coin_data.items():
+        if df.empty:
+            continue
+        df = df.sort_index()
+        df.index = df.index.rename("date")
+        for period, part in df.groupby(df.index.to_period("M")):
+            month = str(period)
+            part_dir = _partition_dir(root, symbol, granularity, month)
+            part_dir.mkdir(parents=True, exist_ok=True)
+            path = part_dir / "part-0.parquet"
+            if path.exists():
+                old = pq.read_table(path).to_pandas().set_index("date")
+                part = pd.concat([old[~old.index.isin(part.index)], part]).sort_index()
+            pq.write_table(
+                pa.Table.from_pandas(part.reset_index(), preserve_index=False),
+                path,
+                row_group_size=row_group_size,
+            )
+            files[path.relative_to(root).as_posix()] = {
+                "symbol": symbol,
+                "granularity": granularity,
+                "month": month,
+                "rows": len(part),
+                "start": part.index.min().isoformat(),
+                "end": part.index.max().isoformat(),
+            }
+
+    _write_manifest(root, files)
+    print(f"✅ Stored {len(coin_data)} symbol(s) in {root}/ ({len(files)} partition files)")
+
+
+def select_files(root, symbols=None, start=None, end=None, granularity=None) -> dict:
+    """
+    Partition files overlapping the request, as {symbol: [paths]}.
+    Uses the manifest when present, else lists only the requested symbol dirs.
+    """
+    root = Path(root)
+    granularity = granularity or cfg.GRANULARITY
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    first_month = str(start.to_period("M")) if start is not None else None
+    last_month = str(end.to_period("M")) if end is not None else None
+
+    def wanted(symbol, month):
+        return (
+            (symbols is None or symbol in symbols)
+            and (first_month is None or month >= first_month)
+            and (last_month is None or month <= last_month)
+        )
+
+    selected = {}
+    manifest = read_manifest(root)
+    if manifest:
+        for rel, meta in sorted(manifest.items()):
+            if meta["granularity"] == granularity and wanted(meta["symbol"], meta["month"]):
+                selected.setdefault(meta["symbol"], []).append(root / rel)
+        return selected
+
+    symbol_dirs = (
+        [root / f"symbol={s}" for s in symbols] if symbols is not None
+        else sorted(root.glob("symbol=*"))
+    )
+    for sym_dir in symbol_dirs:
+        symbol = sym_dir.name.split("=", 1)[1]
+        for month_dir in sorted((sym_dir / f"granularity={granularity}").glob("month=*")):
+            if wanted(symbol, month_dir.name.split("=", 1)[1]):
+                selected.setdefault(symbol, []).extend(sorted(month_dir.glob("*.parquet")))
+    return selected
+
+
+def _read_file(path, start, end, columns):
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("date", "<=", pd.Timestamp(end)))
+    table = pq.read_table(
+        path,
+        columns=None if columns is None else ["date", *columns],
+        filters=filters or None,
+    )
+    return table.to_pandas().set_index("date")
+
+
+def load_partitioned(
+    root=None,
+    symbols=None,
+    start=None,
+    end=None,
+    columns=None,
+    granularity=None,
+    max_workers=None,
+):
+    """
+    Load {symbol: DataFrame} from the partitioned store, reading only the
+    requested symbols, months and columns; rows outside [start, end] are
+    skipped with row-group statistics. Files are read in parallel threads.
+    """
+    root = Path(root or cfg.COIN_DATA_STORE)
+    files = select_files(root, symbols, start, end, granularity)
+    jobs = [(sym, path) for sym, paths in files.items() for path in paths]
+
+    with ThreadPoolExecutor(max_workers=max_workers or cfg.MAX_WORKERS) as pool:
+        frames = list(pool.map(lambda job: _read_file(job[1], start, end, columns), jobs))
+
+    coin_data = {}
+    for (sym, _), df in zip(jobs, frames):
+        coin_data.setdefault(sym, []).append(df)
+    coin_data = {sym: pd.concat(dfs).sort_index() for sym, dfs in coin_data.items()}
+    print(f"📂 Loaded {len(coin_data)} DataFrames from {len(jobs)} partition file(s) in {root}/")
+    return coin_data
+
+
+if __name__ == "__main__":
+    # Migrate the flat cache into the partitioned store:
+    #   python -m data.store [cache_dir]
+    import sys
+
+    from data.fetch import load_coin_data_dict
+
+    write_partitioned(load_coin_data_dict(sys.argv[1] if len(sys.argv) > 1 else "coin_data_cache"))
@@ -0,0 +1,297 @@
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from utils.helpers import granularity_to_timedelta
+
+
+def interval_to_ms(interval: str) -> int:
+    """Binance interval string ('1m', '1h', '1d', ...) -> bar length in ms."""
+    return int(granularity_to_timedelta(interval).total_seconds() * 1000)
+
+
+def klines_weight(limit: int) -> int:
+    """Request weight of /klines, per Binance's limit brackets."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def _format_rows(open_times_ms, open_, high, low, close, volume, bar_ms) -> list:
+    return [
+        [
+            int(t), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.4f}",
+            int(t) + bar_ms - 1, f"{v * c:.4f}", 100, f"{v / 2:.4f}", f"{v * c / 2:.4f}", "0",
+        ]
+        for t, o, h, l, c, v in zip(open_times_ms, open_, high, low, close, volume)
+    ]
+
+
+def synthetic_kline_rows(symbol: str, interval: str, open_times_ms) -> list:
+    """
+    Deterministic synthetic klines for `symbol` at the given open times.
+    The same (symbol, open_time) always yields the same bar, so any
+    startTime/endTime window is reproducible without storing history.
+    """
+    seed = zlib.crc32(symbol.encode())
+    base = 1.0 + (seed % 100_000)
+    k = np.asarray(open_times_ms, dtype="int64") // interval_to_ms(interval)
+
+    def _level(k):
+        return base * np.exp(
+            0.15 * np.sin(k / 37.0 + seed % 7)
+            + 0.05 * np.sin(k / 5.0 + seed % 3)
+            + 0.01 * np.sin(k * 12.9898 + seed)
+        )
+
+    close = _level(k)
+    open_ = _level(k - 1)
+    wick = 0.002 + 0.003 * np.abs(np.sin(k * 78.233 + seed))
+    high = np.maximum(open_, close) * (1 + wick)
+    low = np.minimum(open_, close) * (1 - wick)
+    volume = 1000.0 + (k * 7919 + seed) % 5000
+
+    return _format_rows(open_times_ms, open_, high, low, close, volume, interval_to_ms(interval))
+
+
+def recorded_kline_rows(df: pd.DataFrame, interval: str) -> list:
+    """OHLCV DataFrame indexed by naive UTC open time (the cache layout) -> kline rows."""
+    open_times = df.index.asi8 // 1_000_000
+    return _format_rows(
+        open_times, df["open"], df["high"], df["low"], df["close"], df["volume"],
+        interval_to_ms(interval),
+    )
+
+
+class StubExchange:
+    """
+    Local Binance-compatible HTTP stand-in serving `/klines` and `/ticker/price`
+    from 127.0.0.1, for offline runs and benchmarks of the fetch and live code.
+
+    Bars come from `recorded` ({symbol: OHLCV DataFrame}, e.g. the parquet cache)
+    and, for other symbols, from deterministic synthetic data.
+    Every response carries Binance's X-MBX-USED-WEIGHT-1M header; requests over
+    `weight_limit` in a minute get 429, and 418/429 can also be injected at
+    random with a seeded RNG so retry behaviour is reproducible.
+
+    Usage:
+        with StubExchange(recorded=load_coin_data_dict(), latency=0.05) as ex:
+            fetch_klines(..., base_url=ex.base_url)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        recorded: Optional[Dict[str, pd.DataFrame]] = None,
+        synthetic: bool = True,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        weight_limit: int = 6000,
+        faults: Optional[Dict[int, float]] = None,
+        retry_after: int = 1,
+        seed: int = 0,
+        clock=time.time,
+    ):
+        """
+        Parameters:
+            recorded (dict): {symbol: OHLCV DataFrame} replayed as-is
+            synthetic (bool): serve synthetic bars for symbols not in `recorded`
+            latency (float): seconds added to every response
+            jitter (float): extra uniform random latency in [0, jitter] seconds
+            weight_limit (int): request weight allowed per minute before 429
+            faults (dict): {status: probability} injected per request, e.g. {429: 0.05, 418: 0.01}
+            retry_after (int): Retry-After seconds sent with injected faults
+            seed (int): RNG seed for jitter and faults
+            clock (callable): epoch seconds, caps served bars at "now"
+        """
+        self.host = host
+        self.port = port
+        self.recorded = recorded or {}
+        self.synthetic = synthetic
+        self.latency = latency
+        self.jitter = jitter
+        self.weight_limit = weight_limit
+        self.faults = faults or {}
+        self.retry_after = retry_after
+        self.clock = clock
+        self.stats = Counter()
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._weight_minute = None
+        self._weight_used = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v3"
+
+    def start(self):
+        handler = type("StubHandler", (_StubHandler,), {"exchange": self})
+        ThreadingHTTPServer.request_queue_size = 1024
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- LIMITS & FAULTS ----------
+    def admit(self, weight: int):
+        """
+        Account `weight` for the current minute and decide the request's fate.
+        Returns:
+            (status or None, headers): None lets the request through
+        """
+        with self._lock:
+            now = self.clock()
+            minute = int(now // 60)
+            if minute != self._weight_minute:
+                self._weight_minute, self._weight_used = minute, 0
+            self._weight_used += weight
+            headers = {"X-MBX-USED-WEIGHT-1M": str(self._weight_used)}
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+            status = None
+            if self._weight_used > self.weight_limit:
+                status = 429
+                headers["Retry-After"] = str(max(1, int(60 - now % 60)))
+            else:
+                draw = self._rng.random()
+                for code, p in sorted(self.faults.items()):
+                    if draw < p:
+                        status = code
+                        headers["Retry-After"] = str(self.retry_after)
+                        break
+                    draw -= p
+
+            self.stats["requests"] += 1
+            self.stats[status or 200] += 1
+
+        if delay > 0:
+            time.sleep(delay)
+        return status, headers
+
+    # ---------- ENDPOINTS ----------
+    def klines(self, params: dict):
+        symbol = params["symbol"]
+        interval = params.get("interval", "1d")
+        bar_ms = interval_to_ms(interval)
+        limit = min(int(params.get("limit", 500)), 1000)
+        now_ms = int(self.clock() * 1000)
+        end_ms = min(int(params.get("endTime", now_ms)), now_ms)
+        start_ms = int(params["startTime"]) if "startTime" in params else None
+
+        if symbol in self.recorded:
+            df = self.recorded[symbol]
+            open_ms = df.index.asi8 // 1_000_000
+            hi = np.searchsorted(open_ms, end_ms, side="right")
+            if start_ms is None:
+                lo = max(0, hi - limit)
+            else:
+                lo = np.searchsorted(open_ms, start_ms, side="left")
+                hi = min(hi, lo + limit)
+            return 200, recorded_kline_rows(df.iloc[lo:hi], interval)
+
+        if not self.synthetic:
+            return 400, {"code": -1121, "msg": "Invalid symbol."}
+
+        if start_ms is not None:
+            first = -(-start_ms // bar_ms) * bar_ms
+            open_times = np.arange(first, end_ms + 1, bar_ms, dtype="int64")[:limit]
+        else:
+            last = end_ms // bar_ms * bar_ms
+            open_times = np.arange(last - (limit - 1) * bar_ms, last + 1, bar_ms, dtype="int64")
+        return 200, synthetic_kline_rows(symbol, interval, open_times)
+
+    def ticker_price(self, params: dict):
+        symbol = params["symbol"]
+        if symbol in self.recorded:
+            return 200, {"symbol": symbol, "price": f"{self.recorded[symbol]['close'].iloc[-1]:.8f}"}
+        if not self.synthetic:
+            return 400, {"code": -1121, "msg": "Invalid symbol."}
+        now_ms = int(self.clock() * 1000)
+        row = synthetic_kline_rows(symbol, "1m", [now_ms // 60_000 * 60_000])[0]
+        return 200, {"symbol": symbol, "price": row[4]}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    exchange = None
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        routes = {
+            "/api/v3/klines": (self.exchange.klines, klines_weight(int(params.get("limit", 500)))),
+            "/api/v3/ticker/price": (self.exchange.ticker_price, 2),
+        }
+        route, weight = routes.get(url.path, (None, 1))
+        status, headers = self.exchange.admit(weight)
+
+        if status is not None:
+            payload = {"code": -1003, "msg": "Too many requests." if status == 429 else "IP banned."}
+        elif route is None:
+            status, payload = 404, {"code": -1, "msg": f"unknown path {url.path}"}
+        else:
+            try:
+                status, payload = route(params)
+            except (KeyError, ValueError) as e:
+                status, payload = 400, {"code": -1100, "msg": str(e)}
+
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    # python -m data.stub_exchange [port] [cache_dir]
+    import sys
+
+    from data.fetch import load_coin_data_dict
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    recorded = load_coin_data_dict(sys.argv[2]) if len(sys.argv) > 2 else None
+    with StubExchange(port=port, recorded=recorded) as ex:
+        print(f"Stub exchange serving on {ex.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
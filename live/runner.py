@@ -0,0 +1,353 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import cfg
+from data.fetch import _retry_delay
+from data.stub_exchange import klines_weight
+from utils.helpers import granularity_to_timedelta
+
+BAR_COLS = ["open", "high", "low", "close", "volume"]
+
+
+@dataclass
+class RebalanceDecision:
+    """Target positions decided at the close of `bar_time`, effective from `effective_time`."""
+    bar_time: pd.Timestamp
+    effective_time: pd.Timestamp
+    targets: Dict[str, float]
+    to_open: List[str]
+    to_close: List[str]
+    latency: float
+    stale_symbols: List[str] = field(default_factory=list)
+
+
+class LiveRunner:
+    """
+    Bar-close driven live runner for many symbols.
+
+    At each close of a `config.GRANULARITY` bar it concurrently pulls the newest
+    closed kline of every symbol, updates the rolling bar buffers and signals,
+    and on `FREQUENCY_DAYS` boundaries emits a RebalanceDecision.
+    Position rule matches BacktestEngine: the position held over a rebalance
+    bar is the signal of the bar before it.
+
+    Requests stay within a per-minute weight budget (synced with the
+    exchange's X-MBX-USED-WEIGHT-1M header). A 418/429 pauses every request
+    for the server's Retry-After before retrying, since requesting on
+    through a 418 escalates to a longer IP ban.
+    """
+
+    def __init__(
+        self,
+        strategy,
+        symbols,
+        config=cfg,
+        base_url: Optional[str] = None,
+        lookback: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        on_decision: Optional[Callable[[RebalanceDecision], None]] = None,
+        close_delay: float = 0.0,
+        clock: Callable[[], float] = time.time,
+        weight_limit: Optional[int] = None,
+        max_retries: int = 3,
+    ):
+        """
+        Parameters:
+            strategy: BaseStrategy, generate_signals({sym: bars}) is called on the buffers
+            symbols (iterable): universe to trade
+            base_url (str): exchange REST base, defaults to config.BINANCE_BASE
+            lookback (int): bars kept per symbol, defaults to strategy.long_window
+            concurrency (int): max in-flight requests, defaults to config.LIVE_CONCURRENCY
+            on_decision (callable): called with each RebalanceDecision
+            close_delay (float): seconds to wait after bar close before fetching
+            clock (callable): wall clock in epoch seconds
+            weight_limit (int): request weight per minute, defaults to config.LIVE_WEIGHT_LIMIT
+            max_retries (int): attempts per request on errors and 418/429
+        """
+        self.strategy = strategy
+        self.symbols = sorted(symbols)
+        self.config = config
+        self.base_url = base_url or config.BINANCE_BASE
+        self.lookback = lookback or getattr(strategy, "long_window", 1)
+        self.concurrency = concurrency or config.LIVE_CONCURRENCY
+        self.on_decision = on_decision
+        self.close_delay = close_delay
+        self.clock = clock
+        self.weight_limit = weight_limit or config.LIVE_WEIGHT_LIMIT
+        self.max_retries = max_retries
+
+        self.bar = granularity_to_timedelta(config.GRANULARITY)
+        self.rebalance_anchor = pd.Timestamp(config.START_DATE).normalize()
+        self.rebalance_every = pd.Timedelta(days=config.FREQUENCY_DAYS)
+
+        self.times: Optional[pd.DatetimeIndex] = None
+        self.values: Optional[np.ndarray] = None  # lookback x field x symbol
+        self.signals: Dict[str, float] = {sym: 0.0 for sym in self.symbols}
+        self.positions: Dict[str, float] = {sym: 0.0 for sym in self.symbols}
+        self.decisions: List[RebalanceDecision] = []
+        self.latencies: List[float] = []
+        self.stale_counts: List[int] = []  # per processed bar, symbols without a new bar
+        self.last_bar_time: Optional[pd.Timestamp] = None
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        # weight used in the exchange's current minute, and the end of a Retry-After pause
+        self._weight_lock = threading.Lock()
+        self._weight_minute = None
+        self._weight_used = 0
+        self._paused_until = 0.0
+
+    # ---------- CALENDAR ----------
+    def last_closed_bar(self, now: Optional[float] = None) -> pd.Timestamp:
+        """Open time of the most recent fully closed bar."""
+        now = pd.Timestamp(self.clock() if now is None else now, unit="s")
+        return now.floor(self.bar) - self.bar
+
+    def is_rebalance(self, ts: pd.Timestamp) -> bool:
+        offset = ts - self.rebalance_anchor
+        return offset >= pd.Timedelta(0) and offset % self.rebalance_every == pd.Timedelta(0)
+
+    # ---------- RATE LIMITS ----------
+    def _acquire(self, weight: int):
+        """Block until `weight` fits in this minute's budget and no Retry-After pause is running."""
+        while True:
+            with self._weight_lock:
+                now = time.time()   # the exchange counts weight per wall-clock minute
+                wait = self._paused_until - now
+                if wait <= 0:
+                    minute = int(now // 60)
+                    if minute != self._weight_minute:
+                        self._weight_minute, self._weight_used = minute, 0
+                    if self._weight_used + weight <= self.weight_limit:
+                        self._weight_used += weight
+                        return
+                    wait = (minute + 1) * 60 - now
+            time.sleep(wait)
+
+    def _observe(self, response):
+        """Sync the budget with the weight the exchange reports (other clients on this IP count too)."""
+        used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is None:
+            return
+        with self._weight_lock:
+            if self._weight_minute == int(time.time() // 60):
+                self._weight_used = max(self._weight_used, int(used))
+
+    def _pause(self, seconds: float):
+        with self._weight_lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+
+    # ---------- FETCH ----------
+    def _get_klines(self, symbol: str, end_time: pd.Timestamp, limit: int) -> list:
+        params = {
+            "symbol": symbol,
+            "interval": self.config.GRANULARITY,
+            "endTime": int(end_time.value // 1_000_000),
+            "limit": limit,
+        }
+        for attempt in range(self.max_retries):
+            self._acquire(klines_weight(limit))
+            try:
+                r = self._session.get(f"{self.base_url}/klines", params=params, timeout=5)
+                self._observe(r)
+                r.raise_for_status()
+                return r.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                response = getattr(e, "response", None)
+                rate_limited = response is not None and response.status_code in (418, 429)
+                if rate_limited:
+                    self._pause(_retry_delay(response, 1.0))
+                if attempt == self.max_retries - 1:
+                    print(f"[WARN] live klines failed for {symbol}: {e}")
+                elif not rate_limited:
+                    # 5xx, timeout or bad JSON: short backoff, as fetch_klines does
+                    time.sleep(_retry_delay(response, 0.5))
+        return []
+
+    async def _fetch_all(self, end_time: pd.Timestamp, limit: int) -> list:
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self._get_klines, sym, end_time, limit)
+            for sym in self.symbols
+        ))
+
+    # ---------- STATE ----------
+    async def warmup(self, now: Optional[float] = None):
+        """Load the last `lookback` closed bars for every symbol."""
+        last = self.last_closed_bar(now)
+        self.times = pd.date_range(end=last, periods=self.lookback, freq=self.bar)
+        rows = await self._fetch_all(last, self.lookback)
+        self.values = np.full((self.lookback, len(BAR_COLS), len(self.symbols)), np.nan)
+        open_ms = self.times.asi8 // 1_000_000
+        for j, data in enumerate(rows):
+            bars = _klines_to_array(data)
+            if len(bars):
+                pos = np.searchsorted(open_ms, bars[:, 0])
+                ok = (pos < len(open_ms)) & (open_ms[np.minimum(pos, len(open_ms) - 1)] == bars[:, 0])
+                self.values[pos[ok], :, j] = bars[ok, 1:]
+        # carry observations forward, as merge_asof does in the engine
+        self.values = pd.DataFrame(
+            self.values.reshape(self.lookback, -1)
+        ).ffill().to_numpy().reshape(self.values.shape)
+        self.last_bar_time = last
+        self._update_signals()
+
+    def _append_bar(self, bar_time: pd.Timestamp, rows: list) -> list:
+        """Shift the buffers by one bar; symbols without a new bar keep the last one."""
+        bar_ms = bar_time.value // 1_000_000
+        new = self.values[-1].copy()
+        stale = []
+        for j, data in enumerate(rows):
+            bars = _klines_to_array(data)
+            hit = bars[bars[:, 0] == bar_ms] if len(bars) else bars
+            if len(hit):
+                new[:, j] = hit[-1, 1:]
+            else:
+                stale.append(self.symbols[j])
+        self.values[:-1] = self.values[1:]
+        self.values[-1] = new
+        self.times = self.times[1:].append(pd.DatetimeIndex([bar_time]))
+        return stale
+
+    def panel(self) -> Dict[str, pd.DataFrame]:
+        """Current bar buffers as {field: DataFrame time x symbol}."""
+        return {
+            f: pd.DataFrame(self.values[:, i, :], index=self.times, columns=self.symbols)
+            for i, f in enumerate(BAR_COLS)
+        }
+
+    def _update_signals(self):
+        last = self.strategy.generate_panel_signals(self.panel()).iloc[-1]
+        self.signals = last.fillna(0.0).to_dict()
+
+    async def on_bar_close(self, bar_time: pd.Timestamp, closed_at: Optional[float] = None):
+        """
+        Process the bar opened at `bar_time`, which has just closed.
+        Returns the RebalanceDecision if the next bar is a rebalance bar, else None.
+        """
+        closed_at = (bar_time + self.bar).value / 1e9 if closed_at is None else closed_at
+        rows = await self._fetch_all(bar_time, 1)
+        stale = self._append_bar(bar_time, rows)
+        self._update_signals()
+        self.last_bar_time = bar_time
+
+        decision = None
+        effective = bar_time + self.bar
+        if self.is_rebalance(effective):
+            targets = {sym: (1.0 if self.signals[sym] == 1 else 0.0) for sym in self.symbols}
+            to_open = [s for s in self.symbols if targets[s] > self.positions[s]]
+            to_close = [s for s in self.symbols if targets[s] < self.positions[s]]
+            self.positions = targets
+            decision = RebalanceDecision(
+                bar_time=bar_time,
+                effective_time=effective,
+                targets=targets,
+                to_open=to_open,
+                to_close=to_close,
+                latency=self.clock() - closed_at,
+                stale_symbols=stale,
+            )
+            self.decisions.append(decision)
+            if self.on_decision is not None:
+                self.on_decision(decision)
+
+        self.latencies.append(self.clock() - closed_at)
+        self.stale_counts.append(len(stale))
+        if stale:
+            print(f"[WARN] {len(stale)} symbol(s) without a new bar at {bar_time}")
+        return decision
+
+    # ---------- LOOP ----------
+    async def run(self, n_bars: Optional[int] = None):
+        """Wait for each bar close and process it, forever or for `n_bars` bars."""
+        if self.last_bar_time is None:
+            await self.warmup()
+        processed = 0
+        while n_bars is None or processed < n_bars:
+            next_bar = self.last_bar_time + self.bar
+            close_at = (next_bar + self.bar).value / 1e9
+            await asyncio.sleep(max(0.0, close_at + self.close_delay - self.clock()))
+            await self.on_bar_close(next_bar, closed_at=close_at)
+            processed += 1
+
+    def latency_summary(self) -> dict:
+        """Bar-close latency percentiles over complete bars (every symbol got its new bar)."""
+        lat = np.asarray(self.latencies, dtype="float64")
+        complete = lat[np.asarray(self.stale_counts) == 0]
+        summary = {"bars": int(lat.size), "complete": int(complete.size)}
+        if complete.size == 0:
+            return summary
+        return {
+            **summary,
+            "p50": float(np.percentile(complete, 50)),
+            "p95": float(np.percentile(complete, 95)),
+            "max": float(complete.max()),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._session.close()
+
+
+def _klines_to_array(data: list) -> np.ndarray:
+    """Binance kline rows -> float array [open_time_ms, open, high, low, close, volume]."""
+    if not data:
+        return np.empty((0, len(BAR_COLS) + 1))
+    return np.array([row[:len(BAR_COLS) + 1] for row in data], dtype="float64")
+
+
+if __name__ == "__main__":
+    # Offline latency check against the local stub exchange. For numbers not
+    # skewed by the stub sharing this interpreter, serve it from another shell
+    # (it keeps Binance's 6000/min, so the replay waits for fresh minutes):
+    #   python -m data.stub_exchange 8765
+    #   python -m live.runner 300 http://127.0.0.1:8765/api/v3
+    import sys
+    from contextlib import nullcontext
+    from dataclasses import replace
+
+    from data.stub_exchange import StubExchange
+    from strategies.breakout import BreakoutStrategy
+
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    base_url = sys.argv[2] if len(sys.argv) > 2 else None
+    symbols = [f"SYM{i:04d}USDT" for i in range(n_symbols)]
+    live_cfg = replace(cfg, GRANULARITY="1h", FREQUENCY_DAYS=1)
+    n_bars, lookback = 48, 20
+    # the replay packs n_bars hourly closes into seconds; live, each close costs
+    # n_symbols weight per hour. The in-process stub and the runner get a budget
+    # for the whole replay, so the demo measures latency rather than throttling.
+    budget = n_symbols * (klines_weight(lookback) + n_bars * klines_weight(1))
+
+    async def _replay(runner, n_bars):
+        start = runner.last_closed_bar() - n_bars * runner.bar
+        await runner.warmup(now=(start + 2 * runner.bar).value / 1e9)
+        for i in range(1, n_bars + 1):
+            await runner.on_bar_close(start + i * runner.bar, closed_at=runner.clock())
+
+    with (StubExchange(weight_limit=budget) if base_url is None else nullcontext()) as ex:
+        runner = LiveRunner(
+            BreakoutStrategy(short_window=5, long_window=lookback, config=live_cfg),
+            symbols,
+            config=live_cfg,
+            base_url=base_url or ex.base_url,
+            weight_limit=None if base_url else budget,
+        )
+        asyncio.run(_replay(runner, n_bars))
+        runner.close()
+
+    print(f"Decisions: {len(runner.decisions)}")
+    print(f"Latency (s) over {n_symbols} symbols: {runner.latency_summary()}")
@@ -9,6 +9,9 @@ from data.fetch import get_coin_data
 from config import cfg
 from strategies.breakout import BreakoutStrategy
 from backtest.engine import BacktestEngine
+from analytics.trades import ledger_from_results, trade_summary
+from backtest.costs import cost_sensitivity
+from data.listing import ListingIndex
 # from reporting import metrics, plot
 
 
@@ -27,8 +30,29 @@ def main():
     )
 
     # ===================== RUN BACKTEST =====================
-    engine = BacktestEngine(coin_data=coin_data,strategy=strategy, config=cfg)
+    # readiness from real first bars (store manifest), not from the loaded window
+    listing = ListingIndex.for_config(cfg, coin_data)
+    engine = BacktestEngine(coin_data=coin_data,strategy=strategy, config=cfg, listing=listing)
     strategy_data = engine.run()
 
+    # ===================== TRADES =====================
+    ledger = ledger_from_results(strategy_data)
+    positions = pd.DataFrame({sym: df["positions"] for sym, df in strategy_data.items()})
+    stops = pd.DataFrame({sym: df["logreturns_stop"] for sym, df in strategy_data.items()})
+    totals, by_symbol = trade_summary(ledger, positions, stop_logret=stops)
+    print(f"[INFO] {totals['nb_trades']} trades, hit rate {totals['hit_rate']:.1%}, "
+          f"annual turnover {totals['annual turnover']:.1f}")
+    print(by_symbol)
+
+    # ===================== COST SENSITIVITY =====================
+    curve, break_even = cost_sensitivity(strategy_data, fees=np.linspace(0.0, 0.01, 11), config=cfg)
+    print(curve[["cost", "total_return", "sharpe", "max_drawdown"]])
+    if np.isfinite(break_even["portfolio"]):
+        print(f"[INFO] Break-even cost per unit traded: {break_even['portfolio']:.4%}")
+    elif totals["nb_trades"] == 0:
+        print("[INFO] No trades, no break-even cost")
+    else:
+        print("[INFO] Portfolio loses before costs, no break-even cost")
+
 if __name__ == "__main__":
     main()
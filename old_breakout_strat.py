@@ -7,6 +7,10 @@ from pathlib import Path
 from config import cfg
 from data.fetch import get_coin_data
 from utils.helpers import granularity_to_pandas_freq,generate_signal,compute_nav,forward_state
+from backtest.risk import EWMACovariance, clean_covariance, risk_parity_weights, vol_target_scale
+from analytics.rolling import periods_per_year
+from utils.journal import Journal
+from data.listing import ListingIndex
 
 # ================= BACKTEST =================
 
@@ -53,13 +57,20 @@ def run_backtest_breakout(config):
     
     breakout_signal_dict=generate_breakout_signals(coin_data,5, 20)
 
-def old_run_backtest_breakout(config):
-    print("IMPORTING breakout_strat.py")
+def old_run_backtest_breakout(config, journal=None, coin_data=None, listing=None):
     strategy_name='breakout_5_20'
+    #event journal: rebalances, opens, closes, pnl; console output per config.JOURNAL_VERBOSITY
+    own_journal = journal is None
+    if own_journal:
+        journal = Journal(config.JOURNAL_PATH, verbosity=config.JOURNAL_VERBOSITY)
 
-    coin_data = get_coin_data(config)
+    #coin_data can be injected (e.g. synthetic data in backtest.compare)
+    if coin_data is None:
+        coin_data = get_coin_data(config)
+        if listing is None:
+            listing = ListingIndex.for_config(config, coin_data)
     
-    print("Starting backtest...")
+    journal.record("run_start", time=config.START_DATE, strategy=strategy_name)
     strategy_data={}
     
     # calculate rebalance date, frequency, and list of all dates
@@ -122,9 +133,14 @@ def old_run_backtest_breakout(config):
         'realized_pnl',
     ]
 
+    #point-in-time tradability: listed with MIN_HISTORY_BARS bars of history and not past the last bar
+    if listing is None:
+        listing = ListingIndex.from_coin_data(coin_data, config.MIN_HISTORY_BARS, history_start=config.START_DATE)
+
     #initializes benchmark & positions
     #start date converted to Timestamp
     start_time=pd.Timestamp(config.START_DATE).normalize()
+    tradable = set(listing.tradable(start_time))
     strategy_data['strat'].loc[start_time, 'benchmark_buy_and_hold'] =config.INITIAL_CAPITAL
 
     for sym in coin_data:
@@ -146,7 +162,9 @@ def old_run_backtest_breakout(config):
         )
         
         #initial signals
-        strategy_data[sym].loc[start_time,'signal']=generate_signal(coin_data.get(sym), start_time)
+        strategy_data[sym].loc[start_time,'signal']=(
+            generate_signal(coin_data.get(sym), start_time) if sym in tradable else 'FLAT'
+        )
         
         #initial allocation
         if strategy_data[sym].loc[start_time,'signal']=='LONG':
@@ -161,6 +179,13 @@ def old_run_backtest_breakout(config):
             )
             strategy_data['strat'].loc[start_time,'total_purchases']+=strategy_data[sym].loc[start_time,'purchase']
 
+    #risk parity: log returns on actual bars only (NaN before listing), covariance updated every bar
+    symbols = list(coin_data)
+    if config.REBALANCING=='risk_parity':
+        close_raw = pd.concat({sym: coin_data[sym]['close'] for sym in symbols}, axis=1).reindex(all_dates)
+        logret_raw = np.log(close_raw).diff().to_numpy()
+        ewma_cov = EWMACovariance(len(symbols), config.RISK_PARITY_HALFLIFE)
+
     #initializes cash & nav
     strategy_data['strat'].loc[start_time,'cash']= (
         config.INITIAL_CAPITAL
@@ -169,10 +194,12 @@ def old_run_backtest_breakout(config):
     strategy_data['strat'].loc[start_time, 'nav']=compute_nav(strategy_data, coin_data, start_time)
 
     # SIMULATION
-    for prev_dt, current_dt in zip(all_dates[:-1], all_dates[1:]):
+    for t, (prev_dt, current_dt) in enumerate(zip(all_dates[:-1], all_dates[1:]), start=1):
         
         #state at start (incl non trading days)
         current_day = pd.to_datetime(current_dt).normalize()
+        if config.REBALANCING=='risk_parity':
+            ewma_cov.update(logret_raw[t])
         forward_state(strategy_data['strat'], STRAT_STATE_COLS, STRAT_EVENT_COLS, prev_dt, current_dt)
         for sym in coin_data:
             df_sym = strategy_data[sym]
@@ -194,15 +221,17 @@ def old_run_backtest_breakout(config):
             reb_idx = rebalance_day_to_idx[current_day]
 #             reb_idx = [pd.to_datetime(d).normalize() for d in rebalance_dates].index(pd.to_datetime(current_dt).normalize())
             pct_reb = (reb_idx+1) / max(1, len(rebalance_dates)) * 100
-            print(f"[{pct_reb:.1f}%] Rebalance date: {current_day.date()}")
+            journal.record("rebalance", time=current_dt, progress=pct_reb, date=current_day.date())
             
             #calculates which coins to buy/sell- step 1
             to_close = []
             to_open = []
+            tradable = set(listing.tradable(current_dt))
             for sym in coin_data:
                 df_sym = strategy_data[sym]
                 prev_signal = df_sym.loc[prev_dt, 'signal']
-                curr_signal = generate_signal(coin_data.get(sym), current_dt)
+                #untradable (not listed long enough, or delisted): flat
+                curr_signal = generate_signal(coin_data.get(sym), current_dt) if sym in tradable else 'FLAT'
                 df_sym.loc[current_dt, 'signal'] = curr_signal
                 if prev_signal == 'LONG' and curr_signal == 'FLAT':
                     to_close.append(sym)
@@ -224,8 +253,12 @@ def old_run_backtest_breakout(config):
                 )
                 df_sym.loc[current_dt,'realized_pnl']=realized_pnl    
                 strategy_data['strat'].loc[current_dt,'total_realized_pnl']+=realized_pnl
-                sign = '+' if realized_pnl >= 0 else ''
-                print(f"📉 Closed position on {sym} | PnL: {sign}{realized_pnl:.2f} USD ({sign}{(realized_pnl/cost_of_acquisition*100):.1f})%")
+                journal.record(
+                    "close", time=current_dt, symbol=sym,
+                    units=float(df_sym.loc[prev_dt,'units']), price=float(df_sym.loc[current_dt,'close']),
+                    sale=float(df_sym.loc[current_dt,'sale']), pnl=float(realized_pnl),
+                    pnl_pct=float(realized_pnl/cost_of_acquisition*100),
+                )
                 strategy_data['strat'].loc[current_dt,'total_positive_negative_close']+=np.sign(df_sym.loc[current_dt,'realized_pnl'])
                 strategy_data['strat'].loc[current_dt,'total_sales']+=df_sym.loc[current_dt,'sale'] 
                 strategy_data[sym].loc[current_dt,'units']=0
@@ -235,7 +268,7 @@ def old_run_backtest_breakout(config):
             #calculates cash from all sales- step 3
             cash_available=strategy_data['strat'].loc[current_dt,'cash']+strategy_data['strat'].loc[current_dt,'total_sales']
             if strategy_data['strat'].loc[current_dt,'closed_positions']>0:
-                print(f"[INFO] Closed {strategy_data['strat'].loc[current_dt,'closed_positions']} position(s)")         
+                journal.record("closed", time=current_dt, count=int(strategy_data['strat'].loc[current_dt,'closed_positions']))
 
             #calculates allocation for new signals - step 4
             # method pro rata nb active signals
@@ -273,6 +306,17 @@ def old_run_backtest_breakout(config):
                 if strategy_data['strat'].loc[current_dt,'opened_positions']>0:
                     weight_per_new_signal=1/strategy_data['strat'].loc[current_dt,'opened_positions']
                 else: weight_per_new_signal=0
+
+            #calculates allocation for new signals if risk parity- step 4 alternative
+            # method equal risk contribution on all active signals, scaled to TARGET_VOL
+            elif config.REBALANCING=='risk_parity':
+                #resizes existing positions as well as opening new ones
+                #buys are done here, so no generic allocation for new signals
+                cash_available=rebalance_risk_parity(
+                    strategy_data, symbols, to_open, ewma_cov, current_dt, cash_available, config, journal
+                )
+                to_open=[]
+                weight_per_new_signal=0
                     
             #calculates cash alloc - step 5
             alloc_per_new_signal = cash_available*weight_per_new_signal
@@ -285,7 +329,10 @@ def old_run_backtest_breakout(config):
                 df_sym.loc[current_dt,'units'] = alloc_per_new_signal /  df_sym.loc[current_dt,'purchase_price']
                 df_sym.loc[current_dt,'purchase']=alloc_per_new_signal
                 strategy_data['strat'].loc[current_dt,'total_purchases']+=df_sym.loc[current_dt,'purchase']
-                print(f"[INFO] Opened new position on {sym}")
+                journal.record(
+                    "open", time=current_dt, symbol=sym, units=float(df_sym.loc[current_dt,'units']),
+                    price=float(df_sym.loc[current_dt,'purchase_price']), purchase=float(alloc_per_new_signal),
+                )
                         
             #updates cash- step 6
             strategy_data['strat'].loc[current_dt,'cash']=(
@@ -296,5 +343,80 @@ def old_run_backtest_breakout(config):
             #updates nav- step 7
             strategy_data['strat'].loc[current_dt, 'nav'] =compute_nav(strategy_data, coin_data, current_dt)
  
+    journal.record("run_end", time=all_dates[-1], strategy=strategy_name, nav=float(strategy_data['strat']['nav'].iloc[-1]))
+    if own_journal:
+        journal.close()
+    else:
+        journal.flush()
     return strategy_name,coin_data,strategy_data
 
+
+
+def rebalance_risk_parity(strategy_data, symbols, to_open, ewma_cov, current_dt, cash_available, config, journal):
+    """
+    Resize held positions and open `to_open` to equal-risk-contribution weights
+    from the EWMA covariance, with gross exposure scaled to config.TARGET_VOL.
+    Sales are done first and their proceeds reused for purchases.
+    Returns:
+        float: cash available after sales; purchases go to total_purchases
+    """
+    strat = strategy_data['strat']
+    held = [sym for sym in symbols if strategy_data[sym].loc[current_dt,'units']>0]
+    active = held + [sym for sym in to_open if sym not in held]
+    if not active:
+        return cash_available
+
+    idx = [symbols.index(sym) for sym in active]
+    cov = clean_covariance(ewma_cov.covariance(idx))
+    weights = risk_parity_weights(cov)
+    scale = vol_target_scale(weights, cov, config.TARGET_VOL, periods_per_year(config.GRANULARITY))
+
+    closes = np.array([strategy_data[sym].loc[current_dt,'close'] for sym in active])
+    units = np.array([strategy_data[sym].loc[current_dt,'units'] for sym in active])
+    nav_now = cash_available + units @ closes
+    delta_value = nav_now*scale*weights - units*closes
+
+    #reduce overweight positions - sales
+    for sym, close, d in zip(active, closes, delta_value):
+        if d >= 0:
+            continue
+        df_sym = strategy_data[sym]
+        sold_units = -d/close
+        sale = sold_units*close*(1-config.FEE)
+        realized_pnl = sale - sold_units*df_sym.loc[current_dt,'purchase_price']
+        df_sym.loc[current_dt,'units'] -= sold_units
+        df_sym.loc[current_dt,'sale'] += sale
+        df_sym.loc[current_dt,'realized_pnl'] += realized_pnl
+        strat.loc[current_dt,'total_sales'] += sale
+        strat.loc[current_dt,'total_realized_pnl'] += realized_pnl
+        cash_available += sale
+        journal.record("resize", time=current_dt, symbol=sym, value=float(d), sale=float(sale), pnl=float(realized_pnl))
+
+    #increase underweight positions - purchases, scaled down if cash is short
+    buys = np.clip(delta_value, 0, None)
+    if buys.sum() > cash_available:
+        buys *= cash_available/buys.sum()
+    for sym, close, buy in zip(active, closes, buys):
+        if buy <= 0:
+            continue
+        df_sym = strategy_data[sym]
+        price = close/(1-config.FEE)
+        old_units = df_sym.loc[current_dt,'units']
+        new_units = buy/price
+        #average cost of the enlarged position
+        df_sym.loc[current_dt,'purchase_price'] = (
+            (old_units*df_sym.loc[current_dt,'purchase_price'] + new_units*price)
+            /(old_units + new_units)
+        )
+        df_sym.loc[current_dt,'units'] = old_units + new_units
+        df_sym.loc[current_dt,'purchase'] += buy
+        strat.loc[current_dt,'total_purchases'] += buy
+        if old_units == 0:
+            strat.loc[current_dt,'opened_positions'] += 1
+            strat.loc[current_dt,'nb_positions'] += 1
+            journal.record("open", time=current_dt, symbol=sym, units=float(new_units), price=float(price), purchase=float(buy))
+        else:
+            journal.record("resize", time=current_dt, symbol=sym, value=float(buy), purchase=float(buy))
+
+    journal.record("risk_parity", time=current_dt, count=len(active), exposure=float(scale))
+    return cash_available
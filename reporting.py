@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from config import config
+from config import cfg as config
 
 
 def metrics(strategy_name,coin_data,strategy_data):
@@ -91,7 +93,7 @@ def metrics(strategy_name,coin_data,strategy_data):
         /metrics['benchmark ann vol']
     )
     strategy_data['strat']['cummax'] = strategy_data['strat']['nav'].cummax()
-    drawdown=-(strategy_data['strat']['nav'].cummax()-strategy_data['strat']['nav'])
+    drawdown=-(strategy_data['strat']['cummax']-strategy_data['strat']['nav'])
     metrics['max drawdown']=drawdown.min() if not drawdown.empty else 0.0
     metrics['average cash allocation'] = (
         strategy_data['strat']['cash'].sum()
@@ -153,18 +155,129 @@ def metrics(strategy_name,coin_data,strategy_data):
 
 
 
-def plot(strategy_data):
-    
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of at most `n_out` points keeping the visual shape of y(x):
+    first and last points, then per bucket the point forming the largest triangle
+    with the previous pick and the next bucket's average.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end >= n - 1:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample_nav(strat, max_points=2000):
+    """
+    Rows of `strat` to draw: LTTB picks on nav, drawdown and benchmark, merged,
+    so the nav shape, every drawdown trough and the benchmark survive.
+    """
+    strat = strat[strat['nav'].notna()]
+    if len(strat) <= max_points:
+        return strat
+    x = strat.index.asi8
+    nav = strat['nav'].to_numpy(dtype="float64")
+    drawdown = nav - np.maximum.accumulate(nav)
+    per_series = max(3, max_points // 3)
+    keep = [lttb(x, nav, per_series), lttb(x, drawdown, per_series)]
+    if 'benchmark_buy_and_hold' in strat:
+        keep.append(lttb(x, strat['benchmark_buy_and_hold'].to_numpy(dtype="float64"), per_series))
+    return strat.iloc[np.unique(np.concatenate(keep))]
+
+
+def _draw_nav(ax, strat, title):
+    cummax = strat['cummax'] if 'cummax' in strat else strat['nav'].cummax()
+    ax.plot(strat.index, strat['nav'], label='Nav')
+    ax.plot(strat.index, cummax, label='Cumulative Max', linestyle='--')
+    if 'benchmark_buy_and_hold' in strat:
+        ax.plot(strat.index, strat['benchmark_buy_and_hold'], label='Buy and hold', color='gray')
+    ax.fill_between(strat.index, cummax, strat['nav'], color='red', alpha=0.2, label='Drawdown')
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Nav")
+    ax.legend()
+    ax.grid(True)
+
+
+def plot_to_file(strat, path, title="Nav vs benchmark & drawdowns", max_points=2000):
+    """
+    Render the nav chart of one `strat` DataFrame to `path` (.png or .svg).
+    Uses a bare Figure, so no GUI backend or pyplot state is involved.
+    """
+    strat = strat.copy()
+    if 'cummax' not in strat:
+        # taken before downsampling, so dropped points do not lower the peak
+        strat['cummax'] = strat['nav'].cummax()
+    fig = Figure(figsize=(12, 6))
+    _draw_nav(fig.add_subplot(), downsample_nav(strat, max_points), title)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+def plot_many(results, out_dir="plots", fmt="png", max_points=2000, workers=None):
+    """
+    Render many nav charts in parallel worker processes.
+    Parameters:
+        results (dict): {name: strat DataFrame with nav (+ benchmark_buy_and_hold)}
+        out_dir (str): output directory, one <name>.<fmt> per result
+        workers (int): process count, defaults to config.MAX_WORKERS
+    Returns:
+        list: written file paths
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    cols = ['nav', 'cummax', 'benchmark_buy_and_hold']
+    jobs = [
+        (strat[[c for c in cols if c in strat]], Path(out_dir) / f"{name}.{fmt}", name)
+        for name, strat in results.items()
+    ]
+    with ProcessPoolExecutor(max_workers=workers or config.MAX_WORKERS) as pool:
+        paths = list(pool.map(
+            plot_to_file,
+            [j[0] for j in jobs], [j[1] for j in jobs], [j[2] for j in jobs],
+            [max_points] * len(jobs),
+        ))
+    print(f"Saved {len(paths)} chart(s) to {out_dir}/")
+    return paths
+
+
+def plot(strategy_data, path=None, max_points=None):
+    """
+    Nav chart of strategy_data['strat'].
+    Shown interactively by default; with `path` it is written headless to a
+    .png/.svg file instead, downsampled to `max_points` (2000 if not given).
+    """
+    if path is not None:
+        return plot_to_file(strategy_data['strat'], path, max_points=max_points or 2000)
+
+    strat = strategy_data['strat']
+    if max_points is not None:
+        strat = downsample_nav(strat, max_points)
+
     # plots
     plt.figure(figsize=(12,6))
-    plt.plot(strategy_data['strat'].index, strategy_data['strat']['nav'], label='Nav')
-    plt.plot(strategy_data['strat'].index, strategy_data['strat']['cummax'], label='Cumulative Max', linestyle='--')
-    plt.plot(strategy_data['strat'].index, strategy_data['strat']['benchmark_buy_and_hold'], label='Buy and hold', color='gray')
-    plt.fill_between(strategy_data['strat'].index, strategy_data['strat']['cummax'], strategy_data['strat']['nav'], color='red', alpha=0.2, label='Drawdown')
-    plt.title("Nav vs benchmark & drawdowns")
-    plt.xlabel("Date")
-    plt.ylabel("Nav")
-    plt.legend()
-    plt.grid(True)
+    _draw_nav(plt.gca(), strat, "Nav vs benchmark & drawdowns")
     plt.tight_layout()
     plt.show()
@@ -0,0 +1,337 @@
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import cfg
+from analytics.rolling import nav_summary, periods_per_year
+from analytics.trades import ledger_from_results, trade_summary
+from backtest.engine import BacktestEngine
+from data.fetch import load_coin_data_dict
+from data.listing import ListingIndex
+from data.store import MANIFEST, load_partitioned
+from utils.helpers import granularity_to_pandas_freq
+from utils.journal import Journal
+from strategies.breakout import BreakoutStrategy
+from strategies.cross_sectional import CrossSectionalMomentumStrategy
+from strategies.indicators import IndicatorGraph
+
+STRATEGIES = {
+    "breakout": BreakoutStrategy,
+    "xs_momentum": CrossSectionalMomentumStrategy,
+}
+
+# Config fields a request may override
+OVERRIDABLE = {"INITIAL_CAPITAL", "FREQUENCY_DAYS", "FEE", "STOP_LOSS", "TAKE_PROFIT", "TRAILING_STOP"}
+
+
+def _nbytes(obj) -> int:
+    """Approximate memory held by cached pandas objects and containers of them."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True))
+    if isinstance(obj, dict):
+        return sum(_nbytes(v) for v in obj.values()) + sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(v) for v in obj) + sys.getsizeof(obj)
+    return sys.getsizeof(obj)
+
+
+def _finite(obj):
+    """NaN / inf floats -> None (JSON null), in nested dicts and lists."""
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key][0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            if size > self.max_bytes:
+                return value  # never cache what cannot fit
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class BacktestService:
+    """
+    Long-running backtest process answering queries from warm memory.
+
+    Raw bars are loaded once (partitioned store, else the flat parquet cache)
+    and reloaded only when the store manifest or cache files change. Aligned
+    price panels, strategy signals and full results are kept in one LRU cache
+    with a memory ceiling, so a repeated or neighbouring query skips loading,
+    alignment and indicator work.
+    """
+
+    def __init__(self, config=cfg, cache_dir="coin_data_cache", max_cache_mb=None):
+        self.config = config
+        self.store_root = Path(config.COIN_DATA_STORE)
+        self.cache_dir = Path(cache_dir)
+        self.cache = LRUCache((max_cache_mb or config.SERVICE_CACHE_MB) * 2**20)
+        self.coin_data = {}
+        self.listing = None
+        self.data_version = None
+        self._reload_lock = threading.Lock()
+        self.refresh()
+
+    # ---------- DATA ----------
+    def _current_version(self):
+        """Cheap fingerprint of the data on disk: manifest mtime, else cache file mtimes."""
+        manifest = self.store_root / MANIFEST
+        if manifest.exists():
+            return ("store", manifest.stat().st_mtime_ns)
+        files = sorted(self.cache_dir.glob("*.parquet"))
+        return ("cache", len(files), max((f.stat().st_mtime_ns for f in files), default=0))
+
+    def refresh(self, force=False) -> bool:
+        """Reload raw bars and drop every cached panel if the data changed."""
+        version = self._current_version()
+        if not force and version == self.data_version:
+            return False
+        with self._reload_lock:
+            if not force and version == self.data_version:
+                return False
+            if version[0] == "store":
+                coin_data = load_partitioned(self.store_root, granularity=self.config.GRANULARITY)
+            else:
+                coin_data = load_coin_data_dict(self.cache_dir)
+            self.coin_data = coin_data
+            # tradability from the whole history loaded, whatever window a request asks for
+            self.listing = ListingIndex.for_config(self.config, coin_data)
+            self.cache.clear()
+            self.data_version = version
+        print(f"🔄 Service data loaded: {len(self.coin_data)} symbols ({version[0]})")
+        return True
+
+    def _request_config(self, request: dict):
+        overrides = {k: v for k, v in request.get("config", {}).items() if k in OVERRIDABLE}
+        unknown = set(request.get("config", {})) - OVERRIDABLE
+        if unknown:
+            raise ValueError(f"Config fields not overridable: {sorted(unknown)}")
+        symbols = request.get("symbols") or sorted(self.config.COIN_SELECTION)
+        missing = [s for s in symbols if s not in self.coin_data]
+        if missing:
+            raise ValueError(f"No data for {missing}")
+        start = pd.Timestamp(request.get("start", self.config.START_DATE)).normalize()
+        end = pd.Timestamp(request.get("end", self.config.END_DATE)).normalize()
+        if start > end:
+            raise ValueError(f"start {start.date()} is after end {end.date()}")
+        # the engine grid, and at least one symbol trading on it
+        grid = pd.date_range(start, end, freq=granularity_to_pandas_freq(self.config.GRANULARITY))
+        if len(grid) < 2:
+            raise ValueError(f"{start.date()} → {end.date()} has {len(grid)} bar(s), need at least 2")
+        if not any(self._has_bars(self.coin_data[s], grid[0], grid[-1]) for s in symbols):
+            raise ValueError(f"No bars between {start.date()} and {end.date()} for {sorted(symbols)}")
+        return replace(
+            self.config,
+            COIN_SELECTION=set(symbols),
+            START_DATE=start.date(),
+            END_DATE=end.date(),
+            **overrides,
+        )
+
+    @staticmethod
+    def _has_bars(df, start, end) -> bool:
+        index = df.index.tz_convert(None) if df.index.tz is not None else df.index
+        return len(index) > 0 and index[0] <= end and index[-1] >= start
+
+    def _aligned(self, engine, key):
+        aligned = self.cache.get(("aligned", key))
+        if aligned is None:
+            aligned = self.cache.put(("aligned", key), engine.align())
+        return aligned
+
+    def _signals(self, engine, aligned, key):
+        strategy = engine.strategy
+        signals = self.cache.get(("signals", strategy.name, strategy.config.FREQUENCY_DAYS, key))
+        if signals is None:
+            # indicators are cached per panel, so other strategies and params reuse them;
+            # the engine resamples for a coarser strategy timeframe and ranks tradable symbols only
+            indicators = IndicatorGraph(aligned, cache=self.cache, key=("indicators", key))
+            signals = self.cache.put(
+                ("signals", strategy.name, strategy.config.FREQUENCY_DAYS, key),
+                engine._generate_signals(aligned, engine.all_dates[0], indicators=indicators, listing=engine.listing),
+            )
+        return signals
+
+    # ---------- QUERIES ----------
+    def backtest(self, request: dict) -> dict:
+        """
+        Run one backtest request.
+        Parameters:
+            request (dict): {'strategy': 'breakout' | 'xs_momentum', 'params': {...},
+                             'symbols': [...], 'start': 'YYYY-MM-DD', 'end': 'YYYY-MM-DD',
+                             'config': {FEE, FREQUENCY_DAYS, INITIAL_CAPITAL, stop overrides},
+                             'nav': bool, include NAV series}
+        Returns:
+            dict: per-symbol and portfolio metrics, trade summary, optional NAVs
+        """
+        t0 = time.perf_counter()
+        self.refresh()
+        if request.get("strategy") not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {request.get('strategy')!r}, use one of {sorted(STRATEGIES)}")
+
+        key = json.dumps(request, sort_keys=True, default=str)
+        result = self.cache.get(("result", key))
+        cached = result is not None
+        if not cached:
+            result = self.cache.put(("result", key), self._run(request))
+
+        return {**result, "cached": cached, "elapsed_ms": round((time.perf_counter() - t0) * 1e3, 2)}
+
+    def _run(self, request: dict) -> dict:
+        config = self._request_config(request)
+        strategy = STRATEGIES[request["strategy"]](**request.get("params", {}), config=config)
+        coin_data = {sym: self.coin_data[sym] for sym in sorted(config.COIN_SELECTION)}
+        engine = BacktestEngine(
+            coin_data=coin_data, strategy=strategy, config=config, journal=Journal(verbosity="quiet"), listing=self.listing
+        )
+
+        # panels depend on universe and dates only, signals also on the strategy
+        data_key = (tuple(coin_data), config.START_DATE, config.END_DATE, config.GRANULARITY)
+        aligned = self._aligned(engine, data_key)
+        signals = self._signals(engine, aligned, data_key)
+        strat_data = engine.run(coin_data_for_sim=aligned, signals=signals)
+
+        ppy = periods_per_year(config.GRANULARITY)
+        navs = pd.DataFrame({sym: df["nav"] for sym, df in strat_data.items()})
+        portfolio = navs.ffill().fillna(config.INITIAL_CAPITAL).sum(axis=1)
+        positions = pd.DataFrame({sym: df["positions"] for sym, df in strat_data.items()})
+        stops = pd.DataFrame({sym: df["logreturns_stop"] for sym, df in strat_data.items()})
+        totals, by_symbol = trade_summary(ledger_from_results(strat_data, fee=config.FEE), positions, stop_logret=stops)
+
+        result = {
+            "strategy": strategy.name,
+            "symbols": list(coin_data),
+            "start": str(config.START_DATE),
+            "end": str(config.END_DATE),
+            "metrics": {
+                "portfolio": nav_summary(portfolio, ppy),
+                **{sym: nav_summary(navs[sym], ppy) for sym in navs},
+            },
+            "trades": totals,
+            "trades_by_symbol": json.loads(by_symbol.to_json(orient="index")),
+        }
+        if request.get("nav"):
+            result["nav"] = {
+                "dates": [t.isoformat() for t in portfolio.index],
+                "portfolio": portfolio.round(6).tolist(),
+            }
+        return result
+
+    def status(self) -> dict:
+        return {
+            "symbols": len(self.coin_data),
+            "data_version": list(self.data_version),
+            "cache_items": len(self.cache),
+            "cache_mb": round(self.cache.nbytes / 2**20, 2),
+            "cache_limit_mb": round(self.cache.max_bytes / 2**20, 2),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    service = None
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, payload):
+        # metrics can be NaN (e.g. no trades), which is not JSON: sent as null
+        body = json.dumps(_finite(payload), default=str, allow_nan=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._reply(200, self.service.status())
+        elif self.path == "/refresh":
+            self._reply(200, {"reloaded": self.service.refresh(force=True)})
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/backtest":
+            self._reply(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self._reply(200, self.service.backtest(request))
+        except (KeyError, ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            print(f"[ERROR] backtest request failed: {e}")
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(service: BacktestService, host=None, port=None):
+    """Serve GET /status, GET /refresh and POST /backtest until interrupted."""
+    handler = type("ServiceHandler", (_ServiceHandler,), {"service": service})
+    server = ThreadingHTTPServer((host or service.config.SERVICE_HOST, port or service.config.SERVICE_PORT), handler)
+    server.daemon_threads = True
+    print(f"🚀 Backtest service on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    # python -m service.server [port]
+    # curl -s localhost:8766/backtest -d '{"strategy": "breakout", "params": {"short_window": 5, "long_window": 20}}'
+    serve(BacktestService(), port=int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -6,6 +6,13 @@ class BaseStrategy(ABC):
     """
     Abstract base class for all strategies.
     """
+    # bar size the signals are computed on, e.g. '1d' on an hourly grid;
+    # None = the engine grid (cfg.GRANULARITY)
+    timeframe = None
+    # strategies choosing among symbols (top-K...) set this to get a `tradable`
+    # (time x symbol bool) mask in generate_signals, so untradable ones are never picked
+    cross_sectional = False
+
     def __init__(self, coin_data: dict, config=cfg):
         """
         Parameters:
@@ -15,6 +22,14 @@ class BaseStrategy(ABC):
         self.coin_data = coin_data
         self.config = config
 
+    @property
+    def warmup_bars(self):
+        """
+        Bars of history needed to compute the signal of a new bar, used to
+        extend runs incrementally. None means the whole history is needed.
+        """
+        return None
+
     @abstractmethod
     def generate_signals(self) -> dict:
         """
@@ -23,4 +38,23 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def generate_panel_signals(self, panel: dict) -> pd.DataFrame:
+        """
+        Signals for a wide panel, used by runners that hold all symbols at once.
+        Default splits the panel per symbol and calls generate_signals;
+        strategies override it with a vectorized version.
+
+        Parameters:
+            panel (dict): {field: DataFrame time x symbol}, fields as in OHLCV
+        Returns:
+            pd.DataFrame: time x symbol signals
+        """
+        fields = list(panel)
+        symbols = panel[fields[0]].columns
+        per_symbol = {
+            sym: pd.concat({f: panel[f][sym] for f in fields}, axis=1)
+            for sym in symbols
+        }
+        return pd.DataFrame(self.generate_signals(per_symbol))
+
 
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from strategies.base import BaseStrategy
+from strategies.indicators import IndicatorGraph, as_graph, rolling_max
 
 class BreakoutStrategy(BaseStrategy):
 
@@ -9,50 +10,66 @@ class BreakoutStrategy(BaseStrategy):
         short_window: int,
         long_window: int,
         config=None,
+        timeframe: str = None,
     ):
         super().__init__(config)
         self.short_window = short_window
         self.long_window = long_window
+        self.timeframe = timeframe
         self.signals = {}
 
     @property
     def name(self):
-        return f"breakout_{self.short_window}_{self.long_window}"
+        suffix = f"_{self.timeframe}" if self.timeframe else ""
+        return f"breakout_{self.short_window}_{self.long_window}{suffix}"
 
-    def generate_signals(self,coin_data_for_sim) -> dict:
+    @property
+    def warmup_bars(self):
+        return max(self.short_window, self.long_window)
+
+    def generate_signals(self, coin_data_for_sim, indicators=None) -> dict:
         """
         Public method to generate signals for all coins.
+        Parameters:
+            coin_data_for_sim (dict): {symbol: OHLCV DataFrame} on the engine grid
+            indicators (IndicatorGraph): shared graph over that data, rolling
+                                         highs already computed there are reused
         Returns:
             dict: {symbol: pd.Series} signals aligned with coin_data_for_sim index
         """
-        self.signals = self._generate_breakout_signals(coin_data_for_sim)
+        self.signals = self._generate_breakout_signals(coin_data_for_sim, indicators)
         return self.signals
 
-    def _generate_breakout_signals(self,coin_data_for_sim:dict) -> dict:
+    def generate_panel_signals(self, panel) -> pd.DataFrame:
         """
-        Private method doing the actual breakout calculation.
+        Breakout signals on a wide panel, one rolling pass for all symbols.
+        Parameters:
+            panel: {field: DataFrame time x symbol} or an IndicatorGraph
+        Returns:
+            pd.DataFrame: time x symbol signals, same values as generate_signals
+        """
+        graph = as_graph(panel)
+        highs_short = graph[rolling_max("high", self.short_window, min_periods=1)]
+        highs_long = graph[rolling_max("high", self.long_window, min_periods=1)]
+        return (highs_short >= highs_long).astype(float)
+
+    def _generate_breakout_signals(self, coin_data_for_sim: dict, indicators=None) -> dict:
+        """
+        Private method doing the actual breakout calculation, on the panel of
+        all non-empty symbols at once.
         Returns:
             dict: {symbol: pd.Series} signals aligned with coin_data_for_sim index
         """
+        graph = indicators or IndicatorGraph(coin_data_for_sim)
+        signals = self.generate_panel_signals(graph) if graph.symbols else pd.DataFrame()
 
         breakout_signals_dict = {}
-       
         for sym, df in coin_data_for_sim.items():
             if df.empty:
-                breakout_signals_dict[sym] = pd.Series(
-                    dtype=float, name="breakout_signal"
-                )
+                breakout_signals_dict[sym] = pd.Series(dtype=float, name="breakout_signal")
                 continue
-
-            if "high" not in df.columns:
-                raise KeyError(f"'high' column missing for {sym}")
-
-            highs_short = df['high'].rolling(self.short_window, min_periods=1).max()
-            highs_long = df['high'].rolling(self.long_window, min_periods=1).max()
-            # breakout_signals_dict[sym][f"signals_{self.name}"] = (highs_short >= highs_long).astype(float)
-            signal = (highs_short >= highs_long).astype(float)
+            signal = signals[sym].reindex(df.index)
             signal.name = f"signals_{self.name}"
-
             breakout_signals_dict[sym] = signal
 
-        return breakout_signals_dict
\ No newline at end of file
+        return breakout_signals_dict
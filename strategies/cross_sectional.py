@@ -0,0 +1,144 @@
+import pandas as pd
+import numpy as np
+from config import cfg
+from strategies.base import BaseStrategy
+from strategies.indicators import IndicatorGraph, as_graph, pct_change, rolling_max
+from utils.helpers import granularity_to_timedelta
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Boolean mask of the `k` highest scores in each row, NaN never selected.
+    Uses one argpartition over all rows (O(n) per row) instead of full sorts;
+    ties at the cut-off are broken arbitrarily.
+    """
+    n_rows, n_cols = scores.shape
+    mask = np.zeros(scores.shape, dtype=bool)
+    if n_rows == 0 or k <= 0:
+        return mask
+    if k >= n_cols:
+        return ~np.isnan(scores)
+    filled = np.where(np.isnan(scores), -np.inf, scores)
+    top = np.argpartition(-filled, k - 1, axis=1)[:, :k]
+    np.put_along_axis(mask, top, True, axis=1)
+    return mask & np.isfinite(filled)
+
+
+class CrossSectionalMomentumStrategy(BaseStrategy):
+    """
+    Ranks the whole universe and holds the top K symbols.
+
+    Scores on the aligned time x symbol matrix:
+        'return'   : N-bar return, close / close N bars ago - 1
+        'breakout' : breakout strength, close / N-bar high - 1 (0 at a new high)
+    Ranking is only done on the bars the engine reads, the bar before each
+    rebalance date, and held in between. Symbols the engine marks untradable
+    at a ranking bar are left out, so their slots go to the next ranked ones.
+    """
+
+    cross_sectional = True
+
+    def __init__(
+        self,
+        top_k: int,
+        lookback: int,
+        score: str = "return",
+        config=None,
+        timeframe: str = None,
+    ):
+        super().__init__({}, config or cfg)
+        if score not in ("return", "breakout"):
+            raise ValueError(f"Unknown score '{score}', use 'return' or 'breakout'")
+        self.top_k = top_k
+        self.lookback = lookback
+        self.score = score
+        self.timeframe = timeframe
+        self.signals = {}
+
+    @property
+    def name(self):
+        suffix = f"_{self.timeframe}" if self.timeframe else ""
+        return f"xs_{self.score}_{self.lookback}_top{self.top_k}{suffix}"
+
+    @property
+    def warmup_bars(self):
+        # score lookback, plus one rebalance period so the held selection is known
+        period = pd.Timedelta(days=self.config.FREQUENCY_DAYS) / self._bar()
+        return self.lookback + int(np.ceil(period)) + 1
+
+    def scores(self, panel) -> pd.DataFrame:
+        """Score matrix (time x symbol) from {field: DataFrame time x symbol} or an IndicatorGraph."""
+        graph = as_graph(panel)
+        if self.score == "return":
+            return graph[pct_change("close", self.lookback)]
+        return graph["close"] / graph[rolling_max("high", self.lookback)] - 1
+
+    def generate_panel_signals(self, panel, rows=None, tradable=None) -> pd.DataFrame:
+        """
+        Top-K selection on a wide panel.
+        Parameters:
+            panel: {field: DataFrame time x symbol} or an IndicatorGraph
+            rows (array-like): positions of the bars to rank, all bars if None;
+                               other bars hold the previous selection
+            tradable (pd.DataFrame): time x symbol bool, symbols ranked only where
+                                     True (missing bars / symbols count as False)
+        Returns:
+            pd.DataFrame: time x symbol signals (1.0 held, 0.0 not)
+        """
+        scores = self.scores(panel)
+        rows = np.arange(len(scores)) if rows is None else np.asarray(rows, dtype=int)
+        values = scores.to_numpy(dtype="float64")[rows]
+        if tradable is not None:
+            ok = tradable.reindex(index=scores.index, columns=scores.columns, fill_value=False)
+            values = np.where(ok.to_numpy(dtype=bool)[rows], values, np.nan)
+        selected = select_top_k(values, self.top_k)
+
+        signals = pd.DataFrame(np.nan, index=scores.index, columns=scores.columns)
+        signals.iloc[rows] = selected.astype(float)
+        return signals.ffill().fillna(0.0)
+
+    def generate_signals(self, coin_data_for_sim, indicators=None, tradable=None) -> dict:
+        """
+        Public method to generate signals for all coins.
+        Parameters:
+            coin_data_for_sim (dict): {symbol: OHLCV DataFrame} on the engine grid
+            indicators (IndicatorGraph): shared graph over that data, reused if given
+            tradable (pd.DataFrame): point-in-time tradability, see generate_panel_signals
+        Returns:
+            dict: {symbol: pd.Series} signals aligned with coin_data_for_sim index
+        """
+        graph = indicators or IndicatorGraph(coin_data_for_sim)
+        symbols = graph.symbols
+        signals = self.generate_panel_signals(
+            graph, rows=self._ranking_rows(graph["close"].index), tradable=tradable
+        )
+        self.signals = {
+            sym: signals[sym].rename(f"signals_{self.name}") for sym in symbols
+        }
+        for sym, df in coin_data_for_sim.items():
+            if df.empty:
+                self.signals[sym] = pd.Series(dtype=float, name=f"signals_{self.name}")
+        return self.signals
+
+    def _bar(self) -> pd.Timedelta:
+        """Size of the bars the strategy ranks on."""
+        return granularity_to_timedelta(self.timeframe or self.config.GRANULARITY)
+
+    def _ranking_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Positions of the bars ranked for the rebalance dates BacktestEngine
+        schedules (every FREQUENCY_DAYS from START_DATE): for each one, the
+        last bar closed at or before it, so a timeframe that does not divide
+        the rebalance period still re-ranks at every rebalance.
+        """
+        if len(index) == 0:
+            return np.empty(0, dtype=int)
+        anchor = pd.Timestamp(self.config.START_DATE).normalize()
+        closes = (index + self._bar()).asi8
+        step = pd.Timedelta(days=self.config.FREQUENCY_DAYS).value
+        last = (closes[-1] - anchor.value) // step
+        if last < 0:
+            return np.empty(0, dtype=int)
+        rebalances = anchor.value + step * np.arange(last + 1)
+        rows = np.searchsorted(closes, rebalances, side="right") - 1
+        return np.unique(rows[rows >= 0])
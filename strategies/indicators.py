@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """
+    Request for one indicator on the shared panel: `kind` applied to `source`
+    (an OHLCV field, or another Indicator) with `params`.
+    Requests are hashable values, so the same indicator asked for by several
+    strategies is a single node of the graph.
+    """
+    kind: str
+    source: object = None
+    params: tuple = ()
+
+    def __str__(self):
+        if self.kind == "field":
+            return self.source
+        args = ", ".join([str(self.source)] + [str(p) for p in self.params])
+        return f"{self.kind}({args})"
+
+
+# ---------- REQUESTS ----------
+def field(name: str) -> Indicator:
+    """Raw OHLCV column as a time x symbol panel."""
+    return Indicator("field", name)
+
+
+def _node(source) -> Indicator:
+    return field(source) if isinstance(source, str) else source
+
+
+def log_return(source="close", periods: int = 1) -> Indicator:
+    return Indicator("log_return", _node(source), (periods,))
+
+
+def pct_change(source="close", periods: int = 1) -> Indicator:
+    return Indicator("pct_change", _node(source), (periods,))
+
+
+def rolling_max(source, window: int, min_periods: int = None) -> Indicator:
+    return Indicator("rolling_max", _node(source), (window, window if min_periods is None else min_periods))
+
+
+def rolling_min(source, window: int, min_periods: int = None) -> Indicator:
+    return Indicator("rolling_min", _node(source), (window, window if min_periods is None else min_periods))
+
+
+def rolling_mean(source, window: int, min_periods: int = None) -> Indicator:
+    return Indicator("rolling_mean", _node(source), (window, window if min_periods is None else min_periods))
+
+
+def ewma_vol(source="close", halflife: float = 20) -> Indicator:
+    """EWMA standard deviation of the 1-bar log returns of `source` (per bar, not annualized)."""
+    return Indicator("ewma_vol", log_return(source), (halflife,))
+
+
+# one vectorized pandas call over the whole panel per kind
+COMPUTE = {
+    "log_return": lambda x, periods: np.log(x).diff(periods),
+    "pct_change": lambda x, periods: x / x.shift(periods) - 1,
+    "rolling_max": lambda x, window, min_periods: x.rolling(window, min_periods=min_periods).max(),
+    "rolling_min": lambda x, window, min_periods: x.rolling(window, min_periods=min_periods).min(),
+    "rolling_mean": lambda x, window, min_periods: x.rolling(window, min_periods=min_periods).mean(),
+    "ewma_vol": lambda r, halflife: r.ewm(halflife=halflife).std(),
+}
+
+
+# ---------- GRAPH ----------
+class IndicatorGraph:
+    """
+    Lazy indicator evaluator over one aligned panel, shared by every strategy
+    (and parameter set) run on it.
+
+    Strategies ask for indicators by request (graph[rolling_max("high", 20)]);
+    each distinct request, and every input it depends on, is computed once for
+    all symbols in vectorized form and cached for the life of the graph.
+    Identical requests from different strategies hit the cache.
+
+    Parameters:
+        coin_data (dict): {symbol: OHLCV DataFrame} on a common index
+                          (e.g. BacktestEngine.align()); empty frames are skipped
+        cache: dict by default; any object with get(key) / put(key, value),
+               such as the service's LRUCache, bounds memory instead
+        key: prefix of the cache keys, to share one cache between panels
+
+    Usage:
+        graph = IndicatorGraph(engine.align())
+        for strategy in strategies:
+            signals = strategy.generate_signals(aligned, indicators=graph)
+    """
+
+    def __init__(self, coin_data: dict, cache=None, key=None):
+        self.coin_data = coin_data
+        self.symbols = [sym for sym, df in coin_data.items() if not df.empty]
+        self.cache = {} if cache is None else cache
+        self.key = key
+        self.computed = 0
+        self.hits = 0
+
+    @classmethod
+    def from_panel(cls, panel: dict, cache=None, key=None):
+        """Graph over an existing {field: DataFrame time x symbol} panel."""
+        graph = cls({}, cache=cache, key=key)
+        graph.symbols = list(next(iter(panel.values())).columns) if panel else []
+        for name, frame in panel.items():
+            graph._store(field(name), frame)
+        return graph
+
+    def __getitem__(self, request) -> pd.DataFrame:
+        """Time x symbol values of an Indicator (or field name), computed on first use."""
+        request = _node(request)
+        value = self._lookup(request)
+        if value is not None:
+            self.hits += 1
+            return value
+        if request.kind == "field":
+            if not self.coin_data:
+                raise KeyError(f"'{request.source}' missing from the panel")
+            missing = [sym for sym in self.symbols if request.source not in self.coin_data[sym].columns]
+            if missing:
+                raise KeyError(f"'{request.source}' column missing for {', '.join(missing)}")
+            value = pd.concat({sym: self.coin_data[sym][request.source] for sym in self.symbols}, axis=1)
+        else:
+            if request.kind not in COMPUTE:
+                raise ValueError(f"Unknown indicator '{request.kind}', use one of {list(COMPUTE)}")
+            value = COMPUTE[request.kind](self[request.source], *request.params)
+        self.computed += 1
+        return self._store(request, value)
+
+    def get(self, *requests) -> list:
+        return [self[r] for r in requests]
+
+    def _lookup(self, request):
+        return self.cache.get((self.key, request))
+
+    def _store(self, request, value):
+        if isinstance(self.cache, dict):
+            self.cache[(self.key, request)] = value
+            return value
+        return self.cache.put((self.key, request), value)
+
+    def stats(self) -> dict:
+        return {"computed": self.computed, "hits": self.hits}
+
+
+def as_graph(data) -> IndicatorGraph:
+    """`data` as an IndicatorGraph: a graph is returned as is, a {field: panel} dict is wrapped."""
+    return data if isinstance(data, IndicatorGraph) else IndicatorGraph.from_panel(data)
@@ -24,6 +24,13 @@ def granularity_to_pandas_freq(g: str) -> str:
         return f"{n}T"
     return g
 
+def granularity_to_timedelta(g: str) -> pd.Timedelta:
+    """Bar length of a Binance interval string ('1m', '4h', '1d', '1w')."""
+    g = str(g).lower()
+    units = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+    n = int(g[:-1]) if len(g) > 1 else 1
+    return pd.Timedelta(**{units[g[-1]]: n})
+
 def is_stable_base(config, symbol: str) -> bool:
     if not isinstance(symbol, str):
         return False
@@ -52,8 +59,8 @@ def get_ticker_price(config, symbol, retries=3, delay=1):
             r.raise_for_status()
             return float(r.json().get('price', 0.0))
         except requests.exceptions.HTTPError as e:
-            if r.status_code == 418:
-                time.sleep(delay)
+            if r.status_code in (418, 429):
+                time.sleep(float(r.headers.get('Retry-After', delay)))
             else:
                 return None
         except Exception:
@@ -0,0 +1,157 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from config import cfg
+
+# Console verbosity, from least to most output
+VERBOSITY = {"quiet": 0, "summary": 1, "trades": 2, "bars": 3}
+
+# Level at which each event reaches the console, and how it is printed
+EVENTS = {
+    "run_start": (1, "Starting backtest {strategy}..."),
+    "run_end": (1, "✅ Backtest {strategy} done | final NAV {nav:.2f}"),
+    "symbol_done": (1, "{symbol:>10}: final NAV {nav:.2f}, {nb_trades} position change(s)"),
+    "rebalance": (3, "[{progress:.1f}%] Rebalance date: {date}"),
+    "close": (2, "📉 Closed position on {symbol} | PnL: {pnl:+.2f} USD ({pnl_pct:+.1f})%"),
+    "closed": (2, "[INFO] Closed {count} position(s)"),
+    "open": (2, "[INFO] Opened new position on {symbol}"),
+    "resize": (3, "[INFO] Resized {symbol} by {value:+.2f} USD"),
+    "risk_parity": (2, "[INFO] Risk parity: {count} position(s), gross exposure {exposure:.0%}"),
+    "frame": (3, "{frame}"),
+}
+
+# Columns every record has in the Arrow format; the rest goes to 'fields' as JSON
+ARROW_COLUMNS = ["seq", "time", "event", "symbol"]
+
+
+class Journal:
+    """
+    Structured event journal for backtests: rebalances, opens, closes, PnL.
+
+    Records are appended to an in-memory buffer and written in batches of
+    `buffer_size` to `path` as JSON lines ('jsonl') or an Arrow IPC stream
+    ('arrow'), so a long run does no per-event I/O. Console output is
+    filtered by `verbosity` ('quiet', 'summary', 'trades', 'bars').
+    Without a path, every record stays in memory (see to_frame).
+    The file is replaced on the first write, not when the journal is built,
+    and again on the first write after close(): one file per run.
+
+    Usage:
+        with Journal("runs/breakout.jsonl", verbosity="summary") as journal:
+            old_run_backtest_breakout(cfg, journal=journal)
+    """
+
+    def __init__(self, path=None, fmt=None, verbosity=None, buffer_size=10_000):
+        self.path = Path(path) if path else None
+        self.fmt = fmt or (self.path.suffix.lstrip(".") if self.path else "jsonl")
+        if self.fmt not in ("jsonl", "arrow"):
+            raise ValueError(f"Unknown journal format '{self.fmt}', use 'jsonl' or 'arrow'")
+        verbosity = verbosity or cfg.JOURNAL_VERBOSITY
+        if verbosity not in VERBOSITY:
+            raise ValueError(f"Unknown verbosity '{verbosity}', use one of {list(VERBOSITY)}")
+        self.level = VERBOSITY[verbosity]
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.records = []  # kept only without a path
+        self.seq = 0
+        self._writer = None
+        self._file = None
+        self._started = False  # file replaced by the first write
+
+    def enabled(self, event: str) -> bool:
+        """True if `event` would reach the console; lets callers skip costly formatting."""
+        return EVENTS.get(event, (1, None))[0] <= self.level
+
+    def record(self, event: str, time=None, symbol=None, **fields):
+        """Buffer one event; print it if the verbosity allows."""
+        level, message = EVENTS.get(event, (1, None))
+        if level <= self.level:
+            print(message.format(symbol=symbol, **fields) if message else f"[{event}] {fields}")
+        if event == "frame":
+            return  # console only
+        self.buffer.append({"seq": self.seq, "time": time, "event": event, "symbol": symbol, **fields})
+        self.seq += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the journal file (or keep them in memory)."""
+        if not self.buffer:
+            return
+        if self.path is None:
+            self.records.extend(self.buffer)
+        elif self.fmt == "jsonl":
+            if not self._started:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a" if self._started else "w") as f:
+                f.write("".join(json.dumps(r, default=str) + "\n" for r in self.buffer))
+        else:
+            self._write_arrow(self.buffer)
+        self._started = True
+        self.buffer = []
+
+    def _write_arrow(self, records):
+        import pyarrow as pa
+
+        batch = pa.RecordBatch.from_pydict(
+            {
+                "seq": [r["seq"] for r in records],
+                "time": pa.array(pd.to_datetime([r["time"] for r in records]), type=pa.timestamp("ns")),
+                "event": [r["event"] for r in records],
+                "symbol": [r["symbol"] for r in records],
+                "fields": [
+                    json.dumps({k: v for k, v in r.items() if k not in ARROW_COLUMNS}, default=str)
+                    for r in records
+                ],
+            },
+            schema=pa.schema([
+                ("seq", pa.int64()),
+                ("time", pa.timestamp("ns")),
+                ("event", pa.string()),
+                ("symbol", pa.string()),
+                ("fields", pa.string()),
+            ]),
+        )
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_stream(self._file, batch.schema)
+        self._writer.write_batch(batch)
+
+    def close(self):
+        """Flush and finalize the file; the next record starts a new one."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._file.close()
+            self._writer = self._file = None
+        self._started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def to_frame(self) -> pd.DataFrame:
+        """All records so far as a DataFrame (from memory, or read back from the file)."""
+        self.flush()
+        if self.path is None:
+            return pd.DataFrame(self.records)
+        return read_journal(self.path, self.fmt)
+
+
+def read_journal(path, fmt=None) -> pd.DataFrame:
+    """Load a journal written by Journal, with event fields as columns."""
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip(".")
+    if fmt == "jsonl":
+        return pd.read_json(path, lines=True)
+    import pyarrow as pa
+
+    with pa.OSFile(str(path), "rb") as f:
+        df = pa.ipc.open_stream(f).read_all().to_pandas()
+    fields = pd.DataFrame([json.loads(s) for s in df.pop("fields")], index=df.index)
+    return pd.concat([df, fields], axis=1)